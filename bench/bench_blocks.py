@@ -0,0 +1,95 @@
+"""
+bench_blocks.py – block-compressed payload decode scaling, 1..N processes
+Python 3.9
+
+Builds a compressible synthetic file, packs it raw and as independent
+blocks, then installs it through every path and prints MB/s:
+
+    plain      the directory copy path (fastcopy, no container)
+    container  raw container entry read through mmap
+    K procs    block-compressed entry decoded by K pool processes
+
+    python bench/bench_blocks.py [--size-mb 256] [--codec zlib] [--json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from install_engine import InstallEngine          # noqa: E402
+from manifest import Manifest                     # noqa: E402
+from payload import PayloadReader, build_payload  # noqa: E402
+from synth import make_compressible               # noqa: E402
+
+
+def _timed_install(manifest, source, out):
+    shutil.rmtree(out, ignore_errors=True)
+    t = time.perf_counter()
+    InstallEngine(manifest, source, out, workers=1).run()
+    return time.perf_counter() - t
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--size-mb", type=int, default=256)
+    ap.add_argument("--codec", default="zlib", choices=("zlib", "lzma", "zstd"))
+    ap.add_argument("--max-procs", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--dir", default=None, help="scratch directory")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+
+    size = args.size_mb * 1024 * 1024
+    scratch = tempfile.mkdtemp(prefix="bench_blocks_", dir=args.dir)
+    try:
+        src = os.path.join(scratch, "src")
+        os.mkdir(src)
+        make_compressible(os.path.join(src, "data.bin"), size)
+        raw_stp = os.path.join(scratch, "raw.stp")
+        blk_stp = os.path.join(scratch, "blk.stp")
+        build_payload(src, raw_stp)
+        t = time.perf_counter()
+        build_payload(src, blk_stp, args.codec + "-blocks",
+                      processes=args.max_procs)
+        pack_s = time.perf_counter() - t
+        out = os.path.join(scratch, "out")
+
+        results = []
+        manifest = Manifest.build(src)
+        results.append(("plain", size / _timed_install(manifest, src, out)))
+        with PayloadReader(raw_stp) as r:
+            results.append(("container", size / _timed_install(r.manifest, r, out)))
+
+        procs, k = [], 1
+        while k < args.max_procs:
+            procs.append(k)
+            k *= 2
+        procs.append(args.max_procs)
+        for k in procs:
+            with PayloadReader(blk_stp, processes=k) as r:
+                _timed_install(r.manifest, r, out)      # warm the pool
+                results.append((f"{k} procs",
+                                size / _timed_install(r.manifest, r, out)))
+
+        report = {"size": size, "codec": args.codec,
+                  "ratio": size / os.path.getsize(blk_stp),
+                  "pack_seconds": pack_s,
+                  "mb_per_s": {name: bps / 1e6 for name, bps in results}}
+        if args.json:
+            print(json.dumps(report, indent=1))
+        else:
+            print(f"{args.size_mb} MB, {args.codec}-blocks, "
+                  f"ratio {report['ratio']:.2f}×")
+            for name, bps in results:
+                print(f"  {name:<10} {bps / 1e6:10.1f} MB/s")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
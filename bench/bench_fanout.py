@@ -0,0 +1,103 @@
+"""
+bench_fanout.py – N targets: N separate installs vs. one fan-out install
+Python 3.9
+
+Builds a compressed container from a synthetic payload (see synth.py),
+then installs it into N target directories twice: once as N InstallEngine
+runs back to back (the payload decoded N times) and once through
+FanoutEngine (decoded once, written N times).
+
+    python bench/bench_fanout.py [--targets 1,2,4,8] [--kind mixed]
+                                 [--compress zlib-blocks] [--scale 0.25]
+                                 [--dir /dev/shm] [--json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synth                                      # noqa: E402
+from fanout import make_fanout                    # noqa: E402
+from install_engine import make_engine           # noqa: E402
+from payload import COMPRESSIONS, build_payload   # noqa: E402
+
+
+def _targets(work, n):
+    dirs = [os.path.join(work, f"t{i}") for i in range(n)]
+    for d in dirs:
+        shutil.rmtree(d, ignore_errors=True)
+    return dirs
+
+
+def _sequential(container, dirs):
+    t = time.perf_counter()
+    for d in dirs:
+        engine = make_engine(d, payload=container, upgrade=False, resume=False,
+                             tune=False)
+        try:
+            engine.run()
+        finally:
+            engine.source.close()
+    return time.perf_counter() - t
+
+
+def _fanout(container, dirs):
+    t = time.perf_counter()
+    engine = make_fanout(dirs, payload=container)
+    try:
+        targets = engine.run()
+    finally:
+        engine.source.close()
+    bad = [t.dir for t in targets if not t.ok]
+    if bad:
+        raise RuntimeError(f"fan-out failed for {bad}")
+    return time.perf_counter() - t
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--targets", default="1,2,4,8")
+    ap.add_argument("--kind", default="mixed", choices=sorted(synth.GENERATORS))
+    ap.add_argument("--compress", default="zlib-blocks", choices=COMPRESSIONS)
+    ap.add_argument("--scale", type=float, default=0.25)
+    ap.add_argument("--dir", default=None,
+                    help="where payload and targets go (default: temp dir)")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix="bench_fanout_", dir=args.dir)
+    try:
+        src = os.path.join(work, "src")
+        files, size = synth.GENERATORS[args.kind](
+            src, **synth.scaled_kwargs(args.kind, args.scale))
+        container = os.path.join(work, "payload.stp")
+        build_payload(src, container, args.compress, processes=os.cpu_count() or 1)
+
+        results = []
+        for n in (int(x) for x in args.targets.split(",")):
+            seq = _sequential(container, _targets(work, n))
+            fan = _fanout(container, _targets(work, n))
+            results.append({"targets": n, "sequential_s": seq, "fanout_s": fan,
+                            "speedup": seq / fan if fan else 0.0})
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps({"files": files, "bytes": size, "results": results},
+                         indent=2))
+        return
+    print(f"{files} files, {size / 1e6:.1f} MB, {args.compress}")
+    print(f"{'targets':>8} {'sequential s':>13} {'fan-out s':>10} {'speedup':>8}")
+    for r in results:
+        print(f"{r['targets']:8d} {r['sequential_s']:13.2f} {r['fanout_s']:10.2f} "
+              f"{r['speedup']:7.2f}×")
+
+
+if __name__ == "__main__":
+    main()
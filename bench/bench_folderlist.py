@@ -0,0 +1,138 @@
+"""
+bench_folderlist.py – FolderList open/close click latency vs. expanded tree size
+Python 3.9 / Tkinter (needs a display – run under Xvfb on a headless box)
+
+Builds a FolderList whose expanded tree holds N nodes, then times one
+open + close of a single node in the order Tk's own toggle does it:
+<<TreeviewOpen>> before -open is set, <<TreeviewClose>> after it is
+cleared (the virtual events fire synchronously from event_generate).
+The node starts unlisted with a dummy child, so "first ms" includes
+starting its background listing.  "node" is the current per-node
+update; "walk" re-creates the old whole-tree icon walk for comparison.
+
+    python bench/bench_folderlist.py [--sizes 100,1000,5000] [--clicks 50] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tkinter as tk                              # noqa: E402
+
+from beta1installer_tk import FolderList, _p      # noqa: E402
+
+
+def _expanded_tree(tree, n, leaf_dir, fanout=20):
+    """
+    n open nodes, *fanout* children each; the last one is a closed,
+    not yet listed folder (*leaf_dir*) with the usual dummy child.
+    """
+    tree._cancel_scans()                          # drop the temp-dir listing
+    tree.delete(*tree.get_children(""))
+    parents, made = [""], 0
+    while made < n - 1:
+        parent = parents.pop(0)
+        for _ in range(min(fanout, n - 1 - made)):
+            iid = tree.insert(parent, "end", text=f"dir{made}", open=True,
+                              values=(f"/nonexistent/dir{made}",))
+            parents.append(iid)
+            made += 1
+    leaf = tree.insert(parents[-1], "end", text="leaf", values=(leaf_dir,))
+    tree.insert(leaf, "end")
+    return leaf
+
+
+def _open(tree, iid):
+    # ttk::treeview::OpenItem – the event comes first, then -open true
+    tree.focus(iid)
+    tree.event_generate("<<TreeviewOpen>>")
+    tree.item(iid, open=True)
+
+
+def _close(tree, iid):
+    # ttk::treeview::CloseItem – -open false first, then the event
+    tree.item(iid, open=False)
+    tree.focus(iid)
+    tree.event_generate("<<TreeviewClose>>")
+
+
+def _walk(tree):
+    # the pre-incremental behaviour: every node re-imaged on every click
+    def visit(iid):
+        open_now = tree.item(iid, "open")
+        tree.item(iid, image=tree._open if open_now else tree._closed)
+        for c in tree.get_children(iid):
+            visit(c)
+    for iid in tree.get_children(""):
+        visit(iid)
+
+
+def _click_latency(tree, iid, clicks, walk):
+    times = []
+    for _ in range(clicks):
+        t = time.perf_counter()
+        for toggle in (_open, _close):
+            toggle(tree, iid)
+            if walk:
+                _walk(tree)
+        times.append(time.perf_counter() - t)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def _check_opened(tree, iid):
+    if str(tree.item(iid, "image")[0]) != str(tree._open):
+        raise RuntimeError("opened node still shows the closed icon")
+    if iid not in tree._scanned:
+        raise RuntimeError("opened node was never listed")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--sizes", default="100,1000,5000,20000")
+    ap.add_argument("--clicks", type=int, default=50)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        sys.exit(f"needs a display ({e}); try: xvfb-run python {sys.argv[0]}")
+    root.withdraw()
+    tree = FolderList(root, tempfile.gettempdir(),
+                      _p(root, "_FLD_CLOSED_GIF"), _p(root, "_FLD_OPEN_GIF"))
+
+    leaf_dir = tempfile.mkdtemp(prefix="bench_folderlist_")
+    results = []
+    try:
+        for n in (int(x) for x in args.sizes.split(",")):
+            leaf = _expanded_tree(tree, n, leaf_dir)
+            t = time.perf_counter()
+            _open(tree, leaf)
+            first = time.perf_counter() - t
+            _check_opened(tree, leaf)
+            _close(tree, leaf)
+            node = _click_latency(tree, leaf, args.clicks, walk=False)
+            walk = _click_latency(tree, leaf, max(3, args.clicks // 10), walk=True)
+            results.append({"nodes": n, "first_ms": first * 1e3,
+                            "node_ms": node * 1e3, "walk_ms": walk * 1e3})
+    finally:
+        root.destroy()
+        os.rmdir(leaf_dir)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'nodes':>8} {'first ms':>10} {'node ms':>10} {'walk ms':>10}")
+    for r in results:
+        print(f"{r['nodes']:8d} {r['first_ms']:10.3f} {r['node_ms']:10.3f} "
+              f"{r['walk_ms']:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+bench_install.py – install-engine throughput on synthetic payloads
+Python 3.9
+
+Generates synthetic payloads (see synth.py), installs each one through
+the engine from a plain directory and from a payload container, into a
+tmpfs target and a real-disk target, and reports per run:
+
+    mb_per_s   payload MB installed per wall-clock second
+    files_per_s
+    peak_rss_mb   of the installing process
+    cpu_s         user + system, pool processes included
+
+Every install runs in a fresh child process so RSS and CPU are its own.
+
+    python bench/bench_install.py [--quick] [--scale 0.5] [--out run.json]
+    python bench/bench_install.py --baseline run.json [--threshold 0.10]
+
+With --baseline, runs whose MB/s fell by more than --threshold (a
+fraction) against the baseline file are listed and the exit status is 1.
+Source files stay in the page cache between runs, so the numbers are the
+engine's and the target's, not the source disk's.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import resource
+except ImportError:                     # Windows – no rusage
+    resource = None
+
+import synth                                      # noqa: E402
+
+TMPFS = "/dev/shm"
+KINDS = ("huge", "tiny", "mixed")
+DATA = ("text", "random")               # compressible / incompressible
+SOURCES = ("dir", "container")
+
+
+# ────────────────────────────────────────────────────────────────
+# Child side: one install, measured
+# ────────────────────────────────────────────────────────────────
+def _rusage():
+    if resource is None:
+        return None, None
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = own.ru_utime + own.ru_stime + kids.ru_utime + kids.ru_stime
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return cpu, own.ru_maxrss * scale / 1e6
+
+
+def _child(source, target, workers):
+    from install_engine import make_engine
+
+    shutil.rmtree(target, ignore_errors=True)
+    t = time.perf_counter()
+    engine = make_engine(target, payload=source, workers=workers,
+                         upgrade=False, resume=False,
+                         tune=False)          # the probe would skew the numbers
+    try:
+        engine.run()
+    finally:
+        close = getattr(engine.source, "close", None)
+        if close:
+            close()
+    wall = time.perf_counter() - t
+    cpu, rss = _rusage()
+    shutil.rmtree(target, ignore_errors=True)
+    json.dump({"wall_s": wall, "cpu_s": cpu, "peak_rss_mb": rss,
+               "files": len(engine.manifest),
+               "bytes": engine.manifest.total_size}, sys.stdout)
+
+
+# ────────────────────────────────────────────────────────────────
+# Parent side
+# ────────────────────────────────────────────────────────────────
+def _prepare(kind, data, scale, work):
+    """Generate one scenario; returns {"dir": path, "container": path}."""
+    from manifest import MANIFEST_NAME, Manifest
+    from payload import build_payload
+
+    src = os.path.join(work, f"{kind}-{data}")
+    gen = synth.GENERATORS[kind]
+    gen(src, compressible=(data == "text"), **synth.scaled_kwargs(kind, scale))
+    stp = src + ".stp"
+    build_payload(src, stp)
+    Manifest.build(src).save(os.path.join(src, MANIFEST_NAME))
+    return {"dir": src, "container": stp}
+
+
+def _run_child(source, target, workers):
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", source, target]
+    if workers:
+        cmd += ["--workers", str(workers)]
+    out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE).stdout
+    return json.loads(out)
+
+
+def _best(source, target, workers, repeat):
+    runs = [_run_child(source, target, workers) for _ in range(repeat)]
+    best = min(runs, key=lambda r: r["wall_s"])
+    wall = best["wall_s"]
+    return {
+        "mb_per_s":    best["bytes"] / wall / 1e6 if wall else 0.0,
+        "files_per_s": best["files"] / wall if wall else 0.0,
+        "wall_s":      wall,
+        "cpu_s":       best["cpu_s"],
+        "peak_rss_mb": max(r["peak_rss_mb"] or 0 for r in runs) or None,
+        "files":       best["files"],
+        "bytes":       best["bytes"],
+    }
+
+
+def compare(results, baseline, threshold):
+    """[(key, old MB/s, new MB/s)] for every run slower by > *threshold*."""
+    slower = []
+    for key, new in results.items():
+        old = baseline.get(key)
+        if old and new["mb_per_s"] < old["mb_per_s"] * (1.0 - threshold):
+            slower.append((key, old["mb_per_s"], new["mb_per_s"]))
+    return slower
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--scale", type=float, default=1.0,
+                    help="multiply the default payload sizes")
+    ap.add_argument("--quick", action="store_true", help="same as --scale 0.05")
+    ap.add_argument("--kinds", default=",".join(KINDS))
+    ap.add_argument("--data", default=",".join(DATA))
+    ap.add_argument("--sources", default=",".join(SOURCES))
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    ap.add_argument("--dir", default=None,
+                    help="real-disk work dir (default: system temp)")
+    ap.add_argument("--out", default=None, help="also write results here")
+    ap.add_argument("--baseline", default=None, help="earlier --out file")
+    ap.add_argument("--threshold", type=float, default=0.10)
+    ap.add_argument("--child", nargs=2, metavar=("SOURCE", "TARGET"),
+                    help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.child:
+        _child(*args.child, args.workers)
+        return 0
+
+    scale = 0.05 if args.quick else args.scale
+    work = tempfile.mkdtemp(prefix="bench-install-", dir=args.dir)
+    targets = {"disk": os.path.join(work, "target")}
+    if os.path.isdir(TMPFS):
+        targets["tmpfs"] = tempfile.mkdtemp(prefix="bench-install-", dir=TMPFS)
+
+    results = {}
+    try:
+        for kind in args.kinds.split(","):
+            for data in args.data.split(","):
+                sources = _prepare(kind, data, scale, os.path.join(work, "src"))
+                for src_kind in args.sources.split(","):
+                    for fs, tdir in targets.items():
+                        key = f"{kind}/{data}/{src_kind}/{fs}"
+                        res = _best(sources[src_kind], os.path.join(tdir, "t"),
+                                    args.workers, args.repeat)
+                        results[key] = res
+                        print(f"{key:28} {res['mb_per_s']:9.1f} MB/s "
+                              f"{res['files_per_s']:9.0f} files/s", file=sys.stderr)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+        if "tmpfs" in targets:
+            shutil.rmtree(targets["tmpfs"], ignore_errors=True)
+
+    report = {"python": sys.version.split()[0], "platform": sys.platform,
+              "cpus": os.cpu_count(), "scale": scale, "results": results}
+    status = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            base = json.load(f)["results"]
+        slower = compare(results, base, args.threshold)
+        report["regressions"] = [{"run": k, "baseline_mb_per_s": old,
+                                  "mb_per_s": new} for k, old, new in slower]
+        for k, old, new in slower:
+            print(f"REGRESSION {k}: {old:.1f} → {new:.1f} MB/s", file=sys.stderr)
+        status = 1 if slower else 0
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
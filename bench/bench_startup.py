@@ -0,0 +1,143 @@
+"""
+bench_startup.py – launch-to-first-window time of the Tk wizard, with a budget
+Python 3.9 / Tkinter (starts Xvfb itself when there is no display)
+
+Every run is a fresh interpreter that imports beta1installer_tk, builds
+the SetupWizard and exits as soon as the welcome page got its first
+Expose.  Reported per run (medians over --repeat, after one warm-up):
+
+    wall          process spawn ➜ first paint, as seen by this script
+    imports       startup.py mark: the wizard module's imports
+    tk_init       … the Tk root exists
+    first_paint   … the welcome page was painted
+
+Exits 1 when the median wall or import time is over its budget, so the
+script can gate a build.
+
+    python bench/bench_startup.py [--repeat 5] [--budget-ms 1500]
+                                  [--import-budget-ms 300] [--json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+BUDGET_MS        = 1500
+IMPORT_BUDGET_MS = 300
+CHILD_TIMEOUT    = 30.0
+
+
+def _child():
+    sys.path.insert(0, ROOT)
+    from startup import STARTUP
+    import beta1installer_tk as wizard
+
+    app = wizard.SetupWizard()
+
+    def reported(marks):
+        print(json.dumps(marks), flush=True)
+        app.after(0, app.destroy)
+    STARTUP.on_report.append(reported)
+    app.after(int(CHILD_TIMEOUT * 1000), app.destroy)
+    app.mainloop()
+
+
+def _start_xvfb():
+    """(process, display) of a private Xvfb, or (None, None) if there is none."""
+    exe = shutil.which("Xvfb")
+    if not exe:
+        return None, None
+    for n in range(99, 120):
+        if os.path.exists(f"/tmp/.X11-unix/X{n}"):
+            continue
+        proc = subprocess.Popen([exe, f":{n}", "-screen", "0", "1024x768x24",
+                                 "-nolisten", "tcp"],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 5.0
+        while time.monotonic() < deadline:
+            if os.path.exists(f"/tmp/.X11-unix/X{n}"):
+                return proc, f":{n}"
+            if proc.poll() is not None:
+                break
+            time.sleep(0.05)
+        proc.kill()
+    return None, None
+
+
+def _run_once(env):
+    t = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--child"],
+                            stdout=subprocess.PIPE, env=env, cwd=ROOT, text=True)
+    line = proc.stdout.readline()
+    wall = time.perf_counter() - t
+    proc.wait(CHILD_TIMEOUT)
+    if not line:
+        raise RuntimeError(f"wizard exited with {proc.returncode} before painting")
+    marks = json.loads(line)
+    return {"wall_ms": wall * 1e3,
+            **{f"{k}_ms": v * 1e3 for k, v in marks.items()}}
+
+
+def _median(xs):
+    xs = sorted(xs)
+    return xs[len(xs) // 2]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=BUDGET_MS,
+                    help="max median spawn ➜ first paint")
+    ap.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS,
+                    help="max median module import time")
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    if args.child:
+        return _child()
+
+    env = dict(os.environ)
+    env.pop("STEAM_SETUP_TRACE", None)
+    xvfb = None
+    if not env.get("DISPLAY"):
+        xvfb, display = _start_xvfb()
+        if xvfb is None:
+            sys.exit("needs a display or Xvfb on PATH")
+        env["DISPLAY"] = display
+    try:
+        _run_once(env)                            # warm-up: disk cache, .pyc
+        runs = [_run_once(env) for _ in range(args.repeat)]
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+            xvfb.wait()
+
+    keys = [k for k in runs[0] if all(k in r for r in runs)]
+    result = {k: _median([r[k] for r in runs]) for k in keys}
+    over = []
+    if result["wall_ms"] > args.budget_ms:
+        over.append(f"first window {result['wall_ms']:.0f} ms > {args.budget_ms:.0f} ms")
+    if result.get("imports_ms", 0) > args.import_budget_ms:
+        over.append(f"imports {result['imports_ms']:.0f} ms > "
+                    f"{args.import_budget_ms:.0f} ms")
+
+    if args.json:
+        print(json.dumps({"median": result, "runs": runs, "over_budget": over},
+                         indent=2))
+    else:
+        for k in keys:
+            print(f"{k[:-3]:>12} {result[k]:9.1f} ms")
+        for msg in over:
+            print(f"OVER BUDGET: {msg}")
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
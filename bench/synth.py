@@ -0,0 +1,114 @@
+"""
+synth.py – synthetic payload generators for the install benchmarks
+Python 3.9
+
+Every generator fills a directory deterministically (same seed, same
+bytes) and returns (files, bytes) written.
+
+    huge    one big file
+    tiny    many small files in a few directories
+    mixed   a game-like tree: deep directories, log-normal file sizes
+
+Content is either compressible word salad (compresses 3-5×, like most
+game data) or incompressible random bytes (like already-packed assets).
+"""
+
+import functools
+import os
+import random
+
+_WORDS = ("steam valve half life counter strike server client engine "
+          "texture model sound map player weapon bsp vpk gcf manifest "
+          "depot license config launcher update content").split()
+
+_CHUNK = 4 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=4)
+def _word_pool(seed):
+    rnd = random.Random(seed)
+    return " ".join(rnd.choices(_WORDS, k=3 * 1024 * 1024)).encode()
+
+
+def _content(rnd, size, compressible):
+    """Yield *size* bytes of synthetic content in chunks."""
+    pool = _word_pool(1) if compressible else None
+    while size:
+        n = min(size, _CHUNK)
+        if compressible:
+            # rotate the pool so repeated blocks aren't byte-identical
+            cut = rnd.randrange(len(pool))
+            chunk = (pool[cut:] + pool[:cut])[:n]
+        else:
+            chunk = rnd.getrandbits(8 * n).to_bytes(n, "little")
+        yield chunk
+        size -= n
+
+
+def make_file(path, size, compressible=True, seed=1):
+    rnd = random.Random(seed)
+    with open(path, "wb") as f:
+        for chunk in _content(rnd, size, compressible):
+            f.write(chunk)
+
+
+def make_compressible(path, size, seed=1):
+    """Word-salad text: compresses about 3-5× like real game data."""
+    make_file(path, size, True, seed)
+
+
+def gen_huge(root, size=512 * 1024 * 1024, compressible=True, seed=1):
+    os.makedirs(root, exist_ok=True)
+    make_file(os.path.join(root, "huge.bin"), size, compressible, seed)
+    return 1, size
+
+
+def gen_tiny(root, count=20000, size=2048, compressible=True, seed=1):
+    rnd = random.Random(seed)
+    total = 0
+    for i in range(count):
+        d = os.path.join(root, f"d{i // 1000:03d}")
+        if i % 1000 == 0:
+            os.makedirs(d, exist_ok=True)
+        n = rnd.randint(size // 2, size * 3 // 2)
+        with open(os.path.join(d, f"f{i:06d}.dat"), "wb") as f:
+            for chunk in _content(rnd, n, compressible):
+                f.write(chunk)
+        total += n
+    return count, total
+
+
+def gen_mixed(root, total=256 * 1024 * 1024, compressible=True, seed=1):
+    """Log-normal sizes (median ~16 KB, a long tail of multi-MB files)."""
+    rnd = random.Random(seed)
+    files = written = 0
+    dirs = [root]
+    os.makedirs(root, exist_ok=True)
+    while written < total:
+        if rnd.random() < 0.05 or len(dirs) == 1:
+            parent = rnd.choice(dirs)
+            if parent.count(os.sep) - root.count(os.sep) < 6:
+                d = os.path.join(parent, f"dir{len(dirs):04d}")
+                os.mkdir(d)
+                dirs.append(d)
+        n = min(int(rnd.lognormvariate(9.7, 2.0)), 64 * 1024 * 1024,
+                total - written)
+        path = os.path.join(rnd.choice(dirs), f"file{files:06d}.dat")
+        with open(path, "wb") as f:
+            for chunk in _content(rnd, n, compressible):
+                f.write(chunk)
+        files += 1
+        written += n
+    return files, written
+
+
+GENERATORS = {"huge": gen_huge, "tiny": gen_tiny, "mixed": gen_mixed}
+
+
+def scaled_kwargs(kind, scale):
+    """Generator size arguments multiplied by *scale* (e.g. 0.1 for --quick)."""
+    if kind == "huge":
+        return {"size": max(1, int(512 * 1024 * 1024 * scale))}
+    if kind == "tiny":
+        return {"count": max(1, int(20000 * scale))}
+    return {"total": max(1, int(256 * 1024 * 1024 * scale))}
@@ -3,6 +3,21 @@ import sys
 import time
 import threading
 
+from tracing import TRACER
+
+if __name__ == "__main__":
+    TRACER.enable_from_argv(sys.argv[1:])   # --trace PATH (or $STEAM_SETUP_TRACE)
+
+if __name__ == "__main__" and "--silent" in sys.argv[1:]:
+    import multiprocessing
+    multiprocessing.freeze_support()
+    from install_cli import main
+    sys.exit(main())
+
+from install_engine import (INSTALL_ERRORS, InstallCancelled, describe_failure,
+                            make_engine)
+from progress import ProgressModel, format_eta
+
 try:
     import win32con
     import win32gui
@@ -14,6 +29,8 @@ except ImportError:
 OUTER_W, OUTER_H = 480, 361
 CLIENT_W, CLIENT_H = 480, 335
 
+WM_INSTALL_DONE = win32con.WM_APP + 1     # wparam: 1 = success, 0 = failure
+
 class WizardPage:
     def __init__(self, hwnd_parent):
         self.hwnd_parent = hwnd_parent
@@ -28,6 +45,7 @@ class WizardPage:
 
 class SetupWizard:
     def __init__(self):
+        self._engine = None             # set while an install runs
         self.hInstance = win32gui.GetModuleHandle(None)
         className = 'SteamSetupWizard'
         wndClass = win32gui.WNDCLASS()
@@ -55,6 +73,8 @@ class SetupWizard:
 
         self.pages = {}
         self.cur_page = None
+        self.install_dir = os.getcwd()
+        self._install_error = None
         self._build_pages()
         win32gui.ShowWindow(self.hwnd, win32con.SW_SHOW)
 
@@ -130,6 +150,7 @@ class SetupWizard:
         )
         page.hwnd = hwnd_static
         page.controls = [hwnd_static]
+        self.hwnd_status = hwnd_static
         return page
 
     def show_page(self, key):
@@ -146,16 +167,71 @@ class SetupWizard:
             if ctl_id == 1:  # Next
                 if self.cur_page == 'welcome':
                     self.show_page('install')
+                    self._begin_install()
             elif ctl_id == 2:  # Cancel
                 win32gui.DestroyWindow(self.hwnd)
+        elif msg == win32con.WM_CLOSE and self._engine is not None:
+            # stop within a buffer; WM_INSTALL_DONE closes once rolled back
+            self._engine.cancel()
+        elif msg == WM_INSTALL_DONE:
+            if wparam == 2:             # cancelled – target left untouched
+                pass
+            elif wparam:
+                win32gui.MessageBox(self.hwnd, 'Steam installation finished.',
+                                    'Install complete', win32con.MB_OK)
+            else:
+                win32gui.MessageBox(self.hwnd,
+                                    f'Installation failed:\n{self._install_error}',
+                                    'Error', win32con.MB_OK | win32con.MB_ICONERROR)
+            win32gui.DestroyWindow(self.hwnd)
         elif msg == win32con.WM_DESTROY:
             win32gui.PostQuitMessage(0)
         else:
             return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
         return 0
 
+    # ----- install -----------------------------------------------------------
+    def _show_status(self, st):
+        # called on the worker thread; WM_SETTEXT is marshalled to the UI thread
+        pct = 100 * st['bytes_done'] // st['bytes_total'] if st['bytes_total'] else 100
+        text = (f"Installing... {pct}%  ({st['files_done']}/{st['files_total']} files)\n"
+                f"{format_eta(st['eta'])}")
+        win32gui.SetWindowText(self.hwnd_status, text)
+
+    def _begin_install(self):
+        model = ProgressModel(on_update=self._show_status, max_hz=10)
+
+        try:
+            self._engine = make_engine(self.install_dir, stats=model)
+        except INSTALL_ERRORS as e:
+            self._install_error = describe_failure(e)
+            win32gui.PostMessage(self.hwnd, WM_INSTALL_DONE, 0, 0)
+            return
+
+        def run():
+            try:
+                self._engine.run()
+            except InstallCancelled:
+                win32gui.PostMessage(self.hwnd, WM_INSTALL_DONE, 2, 0)
+                return
+            except INSTALL_ERRORS as e:
+                self._install_error = describe_failure(e, self._engine)
+                win32gui.PostMessage(self.hwnd, WM_INSTALL_DONE, 0, 0)
+                return
+            except Exception as e:             # a bug – still end in a dialog
+                import traceback
+                traceback.print_exc()
+                self._install_error = f"{type(e).__name__}: {e}"
+                win32gui.PostMessage(self.hwnd, WM_INSTALL_DONE, 0, 0)
+                return
+            win32gui.PostMessage(self.hwnd, WM_INSTALL_DONE, 1, 0)
+
+        threading.Thread(target=run, daemon=True).start()
+
     def run(self):
         win32gui.PumpMessages()
 
 if __name__ == '__main__':
+    import multiprocessing
+    multiprocessing.freeze_support()      # block decoding uses a process pool
     SetupWizard().run()
@@ -1,24 +1,35 @@
 """
 steam_setup_wizard.py – pixel-perfect clone of the classic Steam Setup wizard
 Python 3.9 / Tkinter
+
+Module level only imports what the welcome page needs.  The folder
+browser's scanners, the install engine and the dialogs are imported the
+first time they are used – a PyInstaller onefile build pays for every
+import at launch.
 """
 
-import os, sys, threading, time, tkinter as tk
-from tkinter import filedialog, messagebox
-import base64
+import os, sys, threading, time, bisect, queue
+
+from startup import STARTUP             # t=0 for the launch-latency marks
+from tracing import TRACER
+
+if __name__ == "__main__":
+    TRACER.enable_from_argv(sys.argv[1:])   # --trace PATH (or $STEAM_SETUP_TRACE)
+
+if __name__ == "__main__" and "--silent" in sys.argv[1:]:
+    # headless install – must not touch Tk (there may be no display at all)
+    import multiprocessing
+    multiprocessing.freeze_support()
+    from install_cli import main
+    sys.exit(main())
+
+import tkinter as tk
 from tkinter import ttk
-from tkinter import PhotoImage
-
-def resource_path(rel_path):
-    """Return absolute path to resource, works for PyInstaller."""
-    base = getattr(sys, '_MEIPASS', os.path.abspath(os.path.dirname(__file__)))
-    return os.path.join(base, rel_path)
-import ctypes
-import platform
-# ────────────────────────────────────────────────────────────────────
-# Classic Browse-for-Folder dialog (Win95-XP look) via SHBrowseForFolder
-# ────────────────────────────────────────────────────────────────────
-from ctypes import wintypes
+
+from image_cache import gif_data, image_file
+from resources import resource_path
+
+STARTUP.mark("imports")
 
 # ────────────────────────────────────────────────────────────────
 # Embedded 16×16 classic Windows icons  (complete base-64 strings)
@@ -35,24 +46,15 @@ R0lGODdhEAAQAIEAAAAAAICAAP/IAP/cMCwAAAAAEAAQAEAISAABCBxIsKDAAAgTKlw4MMCAhw8DGDwo
 """
 
 
-# ── tiny yellow/grey 16×16 fallback images ─────────────────────────
-def _make_fallback(master, colour):
-    img = PhotoImage(master=master, width=16, height=16)
-    img.put(colour, to=(0, 0, 15, 15))
-    return img
-
-def _p(master, b64_or_none):
+def _p(master, name):
     """
-    Create a PhotoImage from a full base-64 GIF string.
-    If that fails (truncated data), return a flat 16×16 placeholder
-    so Tk never raises TclError.
+    Shared PhotoImage for the embedded GIF global *name*, decoded once per
+    Tk root.  If the data won't decode (truncated), a flat 16×16
+    placeholder is used so Tk never raises TclError.
     """
-    try:
-        return PhotoImage(master=master, data="".join(b64_or_none.split()))
-    except Exception:
-        # yellow = folder, grey = drive
-        fallback = "#F0C000" if "FLD" in b64_or_none else "#808080"
-        return _make_fallback(master, fallback)
+    # yellow = folder, grey = drive
+    fallback = "#F0C000" if "FLD" in name else "#808080"
+    return gif_data(master, name, globals()[name], fallback)
 
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -75,11 +77,18 @@ NEXT_RECT             = (301, BTN_Y, 73, 23)              # :contentReference[oa
 CANCEL_RECT           = (388, BTN_Y, 74, 23)              # :contentReference[oaicite:12]{index=12}
 
 class DriveComboBox(ttk.Frame):
-    """Drop-down with icon + drive letter + volume label (read-only)."""
-    def __init__(self, master, icon, *, width=120, font=None):
+    """
+    Drop-down with icon + drive letter + volume label (read-only).
+    Volumes are probed in the background (see volumes.py) and appear in
+    the list as they answer.
+    """
+    POLL_MS = 20
+
+    def __init__(self, master, icon, *, width=120, font=None, provider=None):
         super().__init__(master)
         self._icon = icon
         self._font = font or ("Helv", -11)
+        self._popup = None
 
         # A true ttk.Combobox (read-only) for native look
         self._var = tk.StringVar()
@@ -90,41 +99,87 @@ class DriveComboBox(ttk.Frame):
         self._cb.pack(fill="x")
         self._cb.bind("<<ComboboxSelected>>", lambda _e: self.event_generate("<<DriveChanged>>"))
 
-        # collect drives + names, then fill list
-        self._drives, self._names = self._scan_drives()
-        self._cb["values"] = [f"{d}  –  {self._names[d]}" for d in self._drives]
-
-        self.set(self._drives[0])        # default C:
+        # probes post volumes here from worker threads; _poll() drains it
+        self._drives, self._names, self._roots = [], {}, {}
+        self._wanted = None                  # last path asked for by set_path()
+        self._found = queue.Queue()
+        self._scan_t0 = time.perf_counter()
+        from volumes import default_provider, discover
+        self._order = discover(provider or default_provider(), self._found.put)
+        self._poll_id = self.after(self.POLL_MS, self._poll)
+
+    def destroy(self):
+        if self._poll_id is not None:
+            self.after_cancel(self._poll_id)
+            self._poll_id = None
+        super().destroy()
 
     @property
     def root_path(self):              # e.g. 'C:\\'
-        d = self.get().rstrip(":")
-        return d + ":\\"
+        d = self.get()
+        if d in self._roots:
+            return self._roots[d]
+        return d.rstrip(":") + ":\\"
+
+    def _poll(self):
+        self._poll_id = None
+        done = False
+        while True:
+            try:
+                vol = self._found.get_nowait()
+            except queue.Empty:
+                break
+            if vol is None:
+                done = True
+                continue
+            self._add(vol)
+        if not done:
+            self._poll_id = self.after(self.POLL_MS, self._poll)
+        else:
+            TRACER.add("drive_scan", "ui", self._scan_t0, time.perf_counter(),
+                       drives=len(self._drives))
 
-    def _scan_drives(self):
-        drives = [f"{d}:" for d in "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-                  if os.path.exists(f"{d}:\\")]
-        names  = {d: "Local Disk" for d in drives}
-        try:
-            import ctypes
-            GetVol = ctypes.windll.kernel32.GetVolumeInformationW
-            buf = ctypes.create_unicode_buffer(261)
-            for d in drives:
-                if GetVol(f"{d}\\", buf, 260, None, None, None, None, 0):
-                    if buf.value: names[d] = buf.value
-        except Exception: pass
-        return drives, names
+    def _add(self, vol):
+        if vol.key in self._names:
+            return
+        self._drives.append(vol.key)
+        self._drives.sort(key=lambda k: self._order.index(k)
+                          if k in self._order else len(self._order))
+        self._names[vol.key], self._roots[vol.key] = vol.label, vol.root
+        current = self.get() if self._var.get() else None
+        self._cb["values"] = [f"{d}  –  {self._names[d]}" for d in self._drives]
+        if self._wanted is not None:
+            self.set_path(self._wanted)
+        elif current is None:
+            self.set(self._drives[0])
+        else:
+            self.set(current)
 
     # API
     def set(self, drive):
-        d = drive.rstrip(":\\")
-        display = f"{d}  –  {self._names.get(d+':','')}"
+        d = drive if drive in self._names else drive.rstrip(":\\") + ":"
+        display = f"{d}  –  {self._names.get(d,'')}"
         self._cb.set(display)                               # show in widget
-        if d + ":" in self._drives:                         # keep index
-            self._cb.current(self._drives.index(d + ":"))
+        if d in self._drives:                               # keep index
+            self._cb.current(self._drives.index(d))
+
+    def set_path(self, path):
+        """
+        Show the volume holding *path*.  Re-checked as volumes arrive, so a
+        later, deeper mount point still wins over '/'.
+        """
+        path = self._wanted = os.path.normcase(os.path.abspath(path))
+        best = None
+        for d in self._drives:
+            root = os.path.normcase(self._roots[d]).rstrip(os.sep)
+            inside = path == root or path.startswith(root + os.sep)
+            if inside and (best is None or len(root) > len(self._roots[best])):
+                best = d
+        if best is not None:
+            self.set(best)
 
-    def get(self):                # returns 'C' .. 'Z'
-        return self._var.get().split()[0]
+    def get(self):                # returns 'C:' .. 'Z:' (or a mount point)
+        return self._var.get().split("  –  ")[0]
 
 
     # pop-down via tk.Menu (supports images)
@@ -145,19 +200,49 @@ class DriveComboBox(ttk.Frame):
 
 # ────────────────────────────────────────────────────────────────
 class FolderList(ttk.Treeview):
-    """Single-column tree that shows closed/open folder icons & a '..' line."""
+    """
+    Single-column tree that shows closed/open folder icons & a '..' line.
+    A folder with more than VIRTUAL_ROWS sub-folders is shown virtualized:
+    only the rows in view exist as Treeview items and scrolling (yview,
+    wheel, keys) re-materializes that window from a plain list of names.
+    Virtual rows can't be expanded – double-click goes into them instead.
+    """
+    PUMP_MS      = 15                  # insert slice interval
+    PUMP_ROWS    = 500                 # rows inserted per slice
+    VIRTUAL_ROWS = 2000                # top-level rows before going virtual
     def __init__(self, master, root_dir, closed_ic, open_ic, **kw):
         super().__init__(master, show="tree", selectmode="browse", **kw)
         self.column("#0", width=230, stretch=False)
         self._closed, self._open = closed_ic, open_ic
         self.root_dir = None
-        self.bind("<<TreeviewOpen>>",  self._refresh)
-        self.bind("<<TreeviewClose>>", self._refresh)
+        # background scans post (generation, parent iid, rows, done) here;
+        # _pump() moves them into the tree a slice at a time
+        self._gen = 0
+        self._rows = queue.Queue()
+        self._pending = []
+        self._active = 0
+        self._pump_id = None
+        self._scanned = set()             # iids whose children were requested
+        self._names = {}                  # parent iid ➜ sorted child names
+        # virtual mode: row 0 is '..', row i is self._names[""][i-1]
+        self._virtual = False
+        self._vfirst = 0                  # first row in view
+        self._vsel = None                 # selected row
+        self._vdirty = False
+        self._vnew = []                   # names not yet merged into the list
+        self._yscroll = None              # the yscrollcommand given to us
+        # Tk opens/closes the focus item – only that node needs updating.
+        # <<TreeviewOpen>> fires *before* Tk sets -open, so don't read it back
+        self.bind("<<TreeviewOpen>>",  lambda _e: self._node_opened(self.focus()))
+        self.bind("<<TreeviewClose>>", lambda _e: self._node_closed(self.focus()))
         self.change_root(root_dir)
         self.bind("<Double-1>", lambda e: self.event_generate("<<TreeActivate>>"))
         self.bind("<<TreeviewSelect>>", lambda _e: self.focus_set())
-        self.bind("<<TreeviewOpen>>",
-                          lambda e: self._populate(self.focus()))
+        self.bind("<<TreeviewSelect>>", self._v_selected, add="+")
+        for seq in ("<Up>", "<Down>", "<Prior>", "<Next>", "<Home>", "<End>"):
+            self.bind(seq, self._v_key)
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.bind(seq, self._v_wheel)
     def _go_into(self, _e=None):
         sel = self.focus()
         if not sel:
@@ -169,8 +254,36 @@ class FolderList(ttk.Treeview):
     # public
     def change_root(self, path):
         self.root_dir = os.path.abspath(path)
+        self._fill_t0 = time.perf_counter()   # until the listing is in the tree
+        self._cancel_scans()
+        self._virtual, self._vfirst, self._vsel = False, 0, None
         self.delete(*self.get_children())
         self._build()
+        self._report_yview()
+
+    def configure(self, cnf=None, **kw):
+        # keep the scrollbar hook for ourselves so virtual mode can feed it
+        if "yscrollcommand" in kw:
+            self._yscroll = kw.pop("yscrollcommand")
+            kw["yscrollcommand"] = self._native_yscroll
+        return super().configure(cnf, **kw)
+    config = configure
+
+    def yview(self, *args):
+        if not self._virtual:
+            return super().yview(*args)
+        if not args:
+            return self._v_fractions()
+        if args[0] == "moveto":
+            self._vfirst = int(float(args[1]) * self._v_total())
+        elif args[0] == "scroll":
+            step = self._v_height() if args[2].startswith("page") else 1
+            self._vfirst += int(args[1]) * step
+        self._v_render()
+
+    def destroy(self):
+        self._cancel_scans()
+        super().destroy()
 
 
     # internal
@@ -191,42 +304,195 @@ class FolderList(ttk.Treeview):
             self._populate(root_iid)
             self.selection_set(root_iid)
         else:
-            for name in sorted(os.listdir(cur)):
-                full = os.path.join(cur, name)
-                if os.path.isdir(full):
-                    iid = self.insert("", "end", text=name,
-                                      image=self._closed, values=(full,))
-                    self.insert(iid, "end")
-                    if full == cur:
-                        self._current_iid = iid
-
-
-    def _refresh(self, _=None):
-        for iid in self.get_children(""):
-            self._set_icon_recursive(iid)
-
-    def _set_icon_recursive(self, iid):
-        open_now = self.item(iid, "open") and "no-open" not in self.item(iid,"tags")
-        self.item(iid, image=self._open if open_now else self._closed)
-        if open_now:
-            self._populate(iid)
-        for c in self.get_children(iid):
-            self._set_icon_recursive(c)
+            self._scan("", cur)
 
-    def _populate(self, iid):
 
+    def _node_opened(self, iid):
+        if not iid or not self.exists(iid) or "no-open" in self.item(iid, "tags"):
+            return
+        self.item(iid, image=self._open)
+        self._populate(iid)
+
+    def _node_closed(self, iid):
+        if iid and self.exists(iid):
+            self.item(iid, image=self._closed)
+
+    def _populate(self, iid):
         # populate once, replacing the dummy child
+        if not iid or iid in self._scanned:
+            return
         kids = self.get_children(iid)
-        if (len(kids) == 0) or (len(kids) == 1 and
-                                 not self.item(kids[0], "values")):
+        if len(kids) == 1 and not self.item(kids[0], "values"):
             self.delete(kids[0])
-            path = self.item(iid,"values")[0]
-            for name in sorted(os.listdir(path)):
-                full = os.path.join(path, name)
-                if os.path.isdir(full):
-                    cid = self.insert(iid, "end", text=name,
-                                      image=self._closed, values=(full,))
-                    self.insert(cid, "end")          # ← keep dummy child
+            self._scan(iid, self.item(iid, "values")[0])
+
+    # ----- background enumeration ----------------------------------------
+    def _scan(self, parent, path):
+        gen = self._gen
+        self._scanned.add(parent)
+        self._names[parent] = []
+        self._active += 1
+        from dirscan import start_scan
+        start_scan(path,
+                   lambda rows, done: self._rows.put((gen, parent, rows, done)),
+                   lambda: gen != self._gen)
+        if self._pump_id is None:
+            self._pump_id = self.after(self.PUMP_MS, self._pump)
+
+    def _cancel_scans(self):
+        """Drop every scan in flight – their results are for another root."""
+        self._gen += 1
+        self._pending.clear()
+        self._active = 0
+        self._scanned.clear()
+        self._names.clear()
+        self._vnew = []
+        if self._pump_id is not None:
+            self.after_cancel(self._pump_id)
+            self._pump_id = None
+
+    def _pump(self):
+        self._pump_id = None
+        while True:
+            try:
+                gen, parent, rows, done = self._rows.get_nowait()
+            except queue.Empty:
+                break
+            if gen != self._gen:
+                continue                  # superseded
+            self._pending.extend((parent, name, full) for name, full in rows)
+            if done:
+                self._active -= 1
+
+        # virtual rows are only names in a list – take them all
+        n = len(self._pending) if self._virtual else self.PUMP_ROWS
+        n = min(len(self._pending), n)
+        for parent, name, full in self._pending[:n]:
+            if self._virtual and parent == "":
+                self._vnew.append(name)
+            elif parent == "" or self.exists(parent):
+                self._insert_sorted(parent, name, full)
+        del self._pending[:n]
+        busy = bool(self._pending or self._active)
+        # merge once the batch is a fair share of the list (or at the end):
+        # the list grows geometrically, so all merges together cost n log n
+        if self._vnew and (not busy or
+                           len(self._vnew) * 4 >= len(self._names[""])):
+            self._v_merge()
+        if self._vdirty:
+            self._v_render()
+
+        if busy:
+            self._pump_id = self.after(self.PUMP_MS, self._pump)
+        elif self._fill_t0 is not None:
+            TRACER.add("tree_fill", "ui", self._fill_t0, time.perf_counter(),
+                       rows=len(self._names.get("", ())))
+            self._fill_t0 = None
+
+    def _insert_sorted(self, parent, name, full):
+        names = self._names[parent]
+        i = bisect.bisect(names, name)
+        names.insert(i, name)
+        if parent == "":
+            i += 1                        # keep '..' on top
+            if len(names) > self.VIRTUAL_ROWS:
+                self._virtual = True
+                self._vdirty = True
+                return
+        cid = self.insert(parent, i, text=name,
+                          image=self._closed, values=(full,))
+        self.insert(cid, "end")          # ← keep dummy child
+
+    # ----- virtual mode --------------------------------------------------
+    def _v_merge(self):
+        """Move the collected names into the list: one sort, not an insert each."""
+        names = self._names[""]
+        # row 0 is '..'; keep the same folder selected across the merge
+        sel = names[self._vsel - 1] if self._vsel else None
+        names += self._vnew
+        self._vnew = []
+        names.sort()                      # timsort merges the sorted run
+        if sel is not None:
+            self._vsel = bisect.bisect_left(names, sel) + 1
+        self._vdirty = True
+
+    def _v_total(self):
+        return len(self._names[""]) + 1
+
+    def _v_height(self):
+        return max(1, int(self.cget("height")))
+
+    def _v_fractions(self):
+        total = self._v_total()
+        return (self._vfirst / total,
+                min(1.0, (self._vfirst + self._v_height()) / total))
+
+    def _v_row(self, i):
+        if i == 0:
+            return "..", os.path.dirname(self.root_dir), ("dotdot",)
+        name = self._names[""][i - 1]
+        return name, os.path.join(self.root_dir, name), ()
+
+    def _v_render(self):
+        """Replace the items in view with rows [_vfirst, _vfirst + height)."""
+        self._vdirty = False
+        total, height = self._v_total(), self._v_height()
+        self._vfirst = max(0, min(self._vfirst, total - height))
+        self.delete(*self.get_children(""))
+        for i in range(self._vfirst, min(total, self._vfirst + height)):
+            text, full, tags = self._v_row(i)
+            iid = self.insert("", "end", text=text, image=self._closed,
+                              values=(full,), tags=tags)
+            if i == self._vsel:
+                self.selection_set(iid)
+                self.focus(iid)
+        super().yview_moveto(0)
+        self._report_yview()
+
+    def _v_selected(self, _e=None):
+        if not self._virtual:
+            return
+        sel = self.selection()
+        kids = self.get_children("")
+        if sel and sel[0] in kids:
+            self._vsel = self._vfirst + kids.index(sel[0])
+
+    def _v_move(self, row):
+        total, height = self._v_total(), self._v_height()
+        self._vsel = row = max(0, min(row, total - 1))
+        if row < self._vfirst:
+            self._vfirst = row
+        elif row >= self._vfirst + height:
+            self._vfirst = row - height + 1
+        self._v_render()
+
+    def _v_key(self, e):
+        if not self._virtual:
+            return None                   # normal Treeview bindings
+        cur = self._vfirst if self._vsel is None else self._vsel
+        page = self._v_height()
+        self._v_move({"Up": cur - 1, "Down": cur + 1,
+                      "Prior": cur - page, "Next": cur + page,
+                      "Home": 0, "End": self._v_total() - 1}[e.keysym])
+        return "break"
+
+    def _v_wheel(self, e):
+        if not self._virtual:
+            return None
+        if e.num == 4 or getattr(e, "delta", 0) > 0:
+            self.yview("scroll", -3, "units")
+        else:
+            self.yview("scroll", 3, "units")
+        return "break"
+
+    def _native_yscroll(self, lo, hi):
+        if not self._virtual and self._yscroll:
+            self._yscroll(lo, hi)
+
+    def _report_yview(self):
+        if self._virtual and self._yscroll:
+            lo, hi = self._v_fractions()
+            self._yscroll(str(lo), str(hi))
 
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -283,6 +549,9 @@ class ThinTitleMixin:
         return (cls._rgb_to_hex(r_a, g_a, b_a),
                 cls._rgb_to_hex(r_i, g_i, b_i))
 
+    def _close_clicked(self):          # the bar's ×; windows may override
+        self.destroy()
+
     # ── main installer ─────────────────────────────────────────────────────
     def _install_thin_title(self, ico="steam.ico"):
         # grab colours once up front
@@ -340,7 +609,7 @@ class ThinTitleMixin:
 
         self._close.bind("<Enter>", lambda e: on_close_hover(True))
         self._close.bind("<Leave>", lambda e: on_close_hover(False))
-        self._close.bind("<Button-1>", lambda e: self.destroy())
+        self._close.bind("<Button-1>", lambda e: self._close_clicked())
         self._close.config(cursor="hand2")
 
         # drag window --------------------------------------------------------
@@ -416,6 +685,7 @@ class ThinTitleMixin:
 class _FolderDialog(ThinTitleMixin, tk.Toplevel):
     WIDTH, HEIGHT = 382, 276
     def __init__(self, parent, initialdir):
+        t0 = time.perf_counter()
         super().__init__(parent)
         self.title("Select Destination Directory")
         self.geometry(f"{self.WIDTH}x{self.HEIGHT}")
@@ -433,9 +703,9 @@ class _FolderDialog(ThinTitleMixin, tk.Toplevel):
         self.transient(parent); self.grab_set()
 
         # icons (now safe – window exists)
-        drv_ic  = _p(self, _DRIVE_GIF)
-        cl_ic   = _p(self, _FLD_CLOSED_GIF)
-        op_ic   = _p(self, _FLD_OPEN_GIF)
+        drv_ic  = _p(self, "_DRIVE_GIF")
+        cl_ic   = _p(self, "_FLD_CLOSED_GIF")
+        op_ic   = _p(self, "_FLD_OPEN_GIF")
 
         # current path variable
         self._cur = tk.StringVar(value=os.path.abspath(initialdir))
@@ -470,6 +740,7 @@ class _FolderDialog(ThinTitleMixin, tk.Toplevel):
                                      width=115, font=BODY_FONT)
 
         self._dcombo.place(x=8, y=215, width=250)                     # same width as tree
+        self._dcombo.set_path(self._cur.get())
 
         self._dcombo.bind("<<DriveChanged>>",
                            lambda _e: self._select_path(self._dcombo.root_path))
@@ -480,6 +751,7 @@ class _FolderDialog(ThinTitleMixin, tk.Toplevel):
                command=self.destroy)\
          .place(x=268, y=34, width=100, height=23)  # just below
 
+        TRACER.add("folder_dialog", "ui", t0, time.perf_counter())
         self.result=""; self.wait_window()
 
     def _ok(self):
@@ -491,7 +763,7 @@ class _FolderDialog(ThinTitleMixin, tk.Toplevel):
             return
         self._cur.set(path)               # ④ updates the entry automatically
         self._tree.change_root(path)      # rebuild tree
-        self._dcombo.set(os.path.splitdrive(path)[0] + ":")   # ② keep combo
+        self._dcombo.set_path(path)       # ② keep combo
 
 def classic_folder_dialog(title, initialdir, hwnd_owner):
     return _FolderDialog(tk._default_root, initialdir).result
@@ -500,15 +772,21 @@ def classic_folder_dialog(title, initialdir, hwnd_owner):
 # helper – Valve logo substitute
 # ────────────────────────────────────────────────────────────────────────────────
 def valve_logo(parent):
-    try:
-        from PIL import Image, ImageTk
-        img = Image.open("valve_logo.png").resize((128, 48), Image.NEAREST)
-        ph  = ImageTk.PhotoImage(img)
-        lbl = tk.Label(parent, image=ph, borderwidth=0); lbl.image = ph
-    except Exception:
+    ph = image_file(parent, resource_path("valve_logo.png"), (128, 48))
+    if ph is not None:
+        lbl = tk.Label(parent, image=ph, borderwidth=0)
+    else:
         lbl = tk.Label(parent, text="VALVE", fg="#f0b000", bg="black",
                        font=("Arial", 18, "bold"), width=12, height=2)
     return lbl
+
+
+def _human_size(n):
+    for unit in ("bytes", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "bytes" else f"{n:.1f} {unit}"
+        n /= 1024
+
 def _short_path(full, max_len=26):
     drive, tail = os.path.splitdrive(full)
     if len(full) <= max_len:
@@ -523,6 +801,8 @@ def _short_path(full, max_len=26):
 class SetupWizard(ThinTitleMixin, tk.Tk):
     def __init__(self):
         tk.Tk.__init__(self)
+        STARTUP.mark("tk_init")
+        TRACER.watch_tk(self)
         self.title("Welcome")
         self.geometry(f"{OUTER_W}x{OUTER_H}")
         self._install_thin_title()
@@ -532,13 +812,27 @@ class SetupWizard(ThinTitleMixin, tk.Tk):
         self.install_dir.trace_add("write", lambda *_: self._update_path_label())
 
 
+        # pages are built the first time they are shown
         self.pages = {}
-        self._build_pages()
-        self._update_path_label()          # initial display
+        self._builders = {"welcome": self._build_welcome,
+                          "dest":    self._build_dest,
+                          "start":   self._build_start,
+                          "install": self._build_install}
+        self._current = None
+        self._path_lbl = None              # lives on the dest page
         self._show("welcome")
+        self._watch_first_paint(self.pages["welcome"])
+
+    def _watch_first_paint(self, widget):
+        def painted(_e):
+            widget.unbind("<Expose>", bind_id)
+            STARTUP.mark("first_paint")
+            self.after_idle(STARTUP.report)
+        bind_id = widget.bind("<Expose>", painted, add="+")
 
     def _update_path_label(self):
-        self._path_lbl.config(text=_short_path(self.install_dir.get()))
+        if self._path_lbl is not None:
+            self._path_lbl.config(text=_short_path(self.install_dir.get()))
 
 
     # ----- common widgets ------------------------------------------------------
@@ -583,9 +877,7 @@ class SetupWizard(ThinTitleMixin, tk.Tk):
 
 
     # ----- build pages ---------------------------------------------------------
-    def _build_pages(self):
-        # ── Welcome page ────────────────────────────────────────────────────
-        p1 = self._page(); self.pages["welcome"] = p1
+    def _build_welcome(self, p1):
         valve_logo(p1).place(x=LEFT_PAD+2, y=34)
 
         # welcome headline
@@ -615,8 +907,7 @@ class SetupWizard(ThinTitleMixin, tk.Tk):
 
         self._button_bar(p1, nxt=lambda: self._show("dest"), show_back=False)
 
-        # ── Destination page ───────────────────────────────────────────────
-        p2 = self._page(); self.pages["dest"] = p2
+    def _build_dest(self, p2):
         valve_logo(p2).place(x=LEFT_PAD+2, y=34)
 
         body = ("Setup will install Steam in the following folder.\n\n"
@@ -634,6 +925,7 @@ class SetupWizard(ThinTitleMixin, tk.Tk):
                                   justify="left", bg=BG,
                                   anchor="w", font=BODY_FONT)
         self._path_lbl.place(x=3, y=4, width=175)   # width for truncation
+        self._update_path_label()
 
         tk.Button(grp, text="Browse...", width=10, font=BODY_FONT,
                   command=self._browse_dir).place(x=216.5, y=0)
@@ -641,8 +933,7 @@ class SetupWizard(ThinTitleMixin, tk.Tk):
         self._button_bar(p2, back=lambda: self._show("welcome"),
                          nxt=lambda: self._show("start"))
 
-        # ── Start page ─────────────────────────────────────────────────────
-        p3 = self._page(); self.pages["start"] = p3
+    def _build_start(self, p3):
         valve_logo(p3).place(x=LEFT_PAD+2, y=34)
         tk.Label(p3, text=("You are now ready to install Steam.\n\n"
                            "Press the Next button to begin the installation or "
@@ -652,8 +943,8 @@ class SetupWizard(ThinTitleMixin, tk.Tk):
         self._button_bar(p3, back=lambda: self._show("dest"),
                          nxt=self._begin_install)
 
-        # ── Installing page (unchanged layout except divider) ──────────────
-        p4 = self._page(); self.pages["install"] = p4
+    def _build_install(self, p4):
+        # layout unchanged except divider
         valve_logo(p4).place(x=LEFT_PAD+2, y=20)
         for i, sym in enumerate(("🕹", "💾", "📂")):
             tk.Label(p4, text=sym, bg=BG, font=("Arial", 15)
@@ -668,28 +959,38 @@ class SetupWizard(ThinTitleMixin, tk.Tk):
         self.cur_prog = tk.Canvas(cur_box, width=290, height=18,
                                   bd=1, relief=tk.SUNKEN, bg="white")
         self.cur_prog.place(x=6, y=45)
+        self._bar_item(self.cur_prog)
 
         all_box = tk.LabelFrame(p4, text="All Files", font=BODY_FONT,
                                 bg=BG, fg="black", bd=1, relief=tk.GROOVE)
         all_box.place(x=157, y=160, width=310, height=88)
-        tk.Label(all_box, text="Time Remaining 0 minutes 0 seconds",
-                 anchor="w", bg=BG, font=BODY_FONT).place(x=6, y=0)
+        self.all_lbl = tk.Label(all_box, text="Time Remaining 0 minutes 0 seconds\n",
+                                anchor="w", justify="left", bg=BG, font=BODY_FONT)
+        self.all_lbl.place(x=6, y=0)
         self.all_prog = tk.Canvas(all_box, width=290, height=18,
                                   bd=1, relief=tk.SUNKEN, bg="white")
         self.all_prog.place(x=6, y=45)
+        self._bar_item(self.all_prog)
 
         # divider + Cancel
         self._divider(p4)
-        tk.Button(p4, text="Cancel", width=10, font=BODY_FONT, command=self.destroy)\
-            .place(x=CANCEL_RECT[0], y=CANCEL_RECT[1],
-                   width=CANCEL_RECT[2], height=CANCEL_RECT[3])
+        self._cancel_btn = tk.Button(p4, text="Cancel", width=10, font=BODY_FONT,
+                                     command=self._cancel_install)
+        self._cancel_btn.place(x=CANCEL_RECT[0], y=CANCEL_RECT[1],
+                               width=CANCEL_RECT[2], height=CANCEL_RECT[3])
 
 
     # ----- nav helpers ---------------------------------------------------------
     def _show(self, key):
-        for f in self.pages.values():
-            f.pack_forget()
-        self.pages[key].pack(fill=tk.BOTH, expand=True)
+        page = self.pages.get(key)
+        if page is None:
+            with TRACER.span(f"page {key}", "ui"):
+                page = self.pages[key] = self._page()
+                self._builders[key](page)
+        if self._current is not None and self._current is not page:
+            self._current.pack_forget()
+        page.pack(fill=tk.BOTH, expand=True)
+        self._current = page
         self.title({"welcome": "Welcome",
                     "dest":    "Choose Destination Location",
                     "start":   "Start Installation",
@@ -697,54 +998,113 @@ class SetupWizard(ThinTitleMixin, tk.Tk):
 
 
 
+    def _bar_item(self, cvs):
+        """One long-lived bar rectangle per canvas; its size is tracked on <Configure>."""
+        cvs.bar = cvs.create_rectangle(0, 0, 0, 0, fill="#0b51ff", width=0)
+        cvs.bar_size = (int(cvs["width"]), int(cvs["height"]))
+        cvs.bar_px = 0
+        def resized(e):
+            cvs.bar_size = (e.width, e.height)
+            cvs.bar_px = -1                       # force a redraw
+        cvs.bind("<Configure>", resized)
+
     def _progress(self, cvs, frac):
-        cvs.delete("bar")
-        w = cvs.winfo_width()
-        cvs.create_rectangle(0, 0, w*frac, cvs.winfo_height(),
-                             fill="#0b51ff", width=0, tags="bar")
-
-    def _begin_install(self):
-        self._show("install")
-        self.update_idletasks()
-
-        src = resource_path("steam.exe")
-        dest_dir = self.install_dir.get()
-        os.makedirs(dest_dir, exist_ok=True)
-        dest = os.path.join(dest_dir, "steam.exe")
-        self.cur_lbl.config(text=f"Copying file:\n{dest}")
-
-        def run():
-            try:
-                total_size = os.path.getsize(src)
-            except OSError:
-                self.after(0, lambda: [
-                    messagebox.showerror("Error", "steam.exe not found"),
-                    self.destroy()
-                ])
-                return
-
-            copied = 0
-            chunk = 4096
-            with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
-                while True:
-                    data = fsrc.read(chunk)
-                    if not data:
-                        break
-                    fdst.write(data)
-                    copied += len(data)
-                    frac = copied / total_size
-                    self.after(0, self._progress, self.cur_prog, frac)
-                    self.after(0, self._progress, self.all_prog, frac)
-                    time.sleep(0.01)
-
-            self.after(0, lambda: [
-                messagebox.showinfo("Install complete",
-                                   "Steam installation finished."),
-                self.destroy()
-            ])
-
-        threading.Thread(target=run, daemon=True).start()
+        w, h = cvs.bar_size
+        px = int(w * min(max(frac, 0.0), 1.0))
+        if px != cvs.bar_px:                      # whole pixels only
+            cvs.bar_px = px
+            cvs.coords(cvs.bar, 0, 0, px, h)
+
+    def _set_text(self, lbl, text):
+        if lbl.cget("text") != text:
+            lbl.config(text=text)
+
+    def _show_stats(self, st):
+        from progress import format_eta
+        if st["current"]:
+            dest = os.path.join(self.install_dir.get(), *st["current"].split("/"))
+            self._set_text(self.cur_lbl, f"Copying file:\n{_short_path(dest, 48)}")
+            size = st["current_size"]
+            self._progress(self.cur_prog, st["current_done"] / size if size else 1.0)
+        total = st["bytes_total"]
+        self._progress(self.all_prog, st["bytes_done"] / total if total else 1.0)
+        self._set_text(self.all_lbl, (
+            f"{format_eta(st['eta'])}\n"
+            f"{_human_size(st['bytes_done'])} of {_human_size(total)}  "
+            f"({_human_size(st['rate'])}/s, {st['files_per_sec']:.0f} files/s)"))
+
+    def _begin_install(self):
+        self._show("install")
+        self.update_idletasks()
+        from tkinter import messagebox
+        from install_engine import (INSTALL_ERRORS, InstallCancelled,
+                                    describe_failure, make_engine)
+        from progress import ProgressModel
+        from uiqueue import UiQueue
+
+        # the worker only posts; one Tk-side poll shows the latest state
+        ui = UiQueue()
+        ui.attach(self, {"stats": self._show_stats})
+        model = ProgressModel(on_update=lambda st: ui.post("stats", st))
+        try:
+            engine = make_engine(self.install_dir.get(), stats=model)
+        except INSTALL_ERRORS as e:
+            ui.detach()
+            messagebox.showerror("Error", "No usable payload:\n"
+                                 + describe_failure(e))
+            self.destroy()
+            return
+
+        self._engine = engine
+
+        def run():
+            try:
+                engine.run()
+            except InstallCancelled:
+                ui.call(self.destroy)          # target left as it was
+                return
+            except INSTALL_ERRORS as e:
+                msg = describe_failure(e, engine)
+                ui.call(lambda: [
+                    messagebox.showerror("Error", f"Installation failed:\n{msg}"),
+                    self.destroy()
+                ])
+                return
+            except Exception as e:             # a bug – still end in a dialog
+                import traceback
+                traceback.print_exc()
+                ui.call(lambda e=e: [
+                    messagebox.showerror("Error", "Installation failed:\n"
+                                         f"{type(e).__name__}: {e}"),
+                    self.destroy()
+                ])
+                return
+
+            ui.call(lambda: [
+                messagebox.showinfo("Install complete",
+                                   "Steam installation finished."),
+                self.destroy()
+            ])
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _close_clicked(self):
+        # during an install the × is Cancel – never pull the window out from
+        # under a running engine
+        self._cancel_install()
+
+    def _cancel_install(self):
+        engine = getattr(self, "_engine", None)
+        if engine is None:
+            self.destroy()
+            return
+        # the worker stops within a buffer, rolls back and closes the window
+        self._cancel_btn.config(state=tk.DISABLED)
+        self.all_lbl.config(text="Cancelling…\n")
+        engine.cancel()
 
 # ────────────────────────────────────────────────────────────────────────────────
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()      # block decoding uses a process pool
     SetupWizard().mainloop()
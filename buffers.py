@@ -0,0 +1,72 @@
+"""
+buffers.py – bounded pool of reusable I/O buffers for the install path
+Python 3.9
+
+Reads in the copy, hash and payload paths go into buffers borrowed from
+a BufferPool with readinto(), and the data is passed on as memoryview
+slices – no bytes object is allocated per chunk.  A pool never holds
+more than *max_bytes*: when every buffer is out, borrow() waits for one
+to come back, so the buffer memory of an install is fixed no matter how
+many workers, files or bytes it moves.
+
+The process-wide POOL is sized from STEAM_SETUP_BUFFER_MB (default 64).
+Never borrow a second buffer while holding one – with a small pool that
+can wait forever.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+BUFFER_SIZE = 1024 * 1024            # bytes per buffer
+POOL_BYTES  = int(os.environ.get("STEAM_SETUP_BUFFER_MB", "64")) * 1024 * 1024
+
+
+class BufferPool:
+    """At most max(1, max_bytes // buffer_size) bytearrays, made on demand."""
+    def __init__(self, max_bytes=POOL_BYTES, buffer_size=BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.max_buffers = max(1, max_bytes // buffer_size)
+        self._free = []
+        self._made = 0
+        self._out = 0
+        self.peak = 0                    # most buffers out at once
+        self._cond = threading.Condition()
+
+    @property
+    def max_bytes(self):
+        return self.max_buffers * self.buffer_size
+
+    def acquire(self):
+        """A free bytearray of buffer_size; waits while the pool is exhausted."""
+        with self._cond:
+            while not self._free and self._made >= self.max_buffers:
+                self._cond.wait()
+            if self._free:
+                buf = self._free.pop()
+            else:
+                self._made += 1
+                buf = None
+            self._out += 1
+            self.peak = max(self.peak, self._out)
+        return buf if buf is not None else bytearray(self.buffer_size)
+
+    def release(self, buf):
+        with self._cond:
+            self._free.append(buf)
+            self._out -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def borrow(self):
+        """``with pool.borrow() as view:`` – a memoryview of a pooled buffer."""
+        buf = self.acquire()
+        view = memoryview(buf)
+        try:
+            yield view
+        finally:
+            view.release()
+            self.release(buf)
+
+
+POOL = BufferPool()
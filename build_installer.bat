@@ -1,9 +1,21 @@
 @echo off
 REM Build the installer in one-file mode
 REM Build the pywin32-based installer
-pyinstaller --noconfirm --onefile --name beta1installer --strip --add-binary "steam.exe;." beta1installer.py
+pyinstaller --noconfirm --onefile --name beta1installer --strip beta1installer.py
 
 REM Further compress the executable using UPX if it is installed
 if exist "dist\beta1installer.exe" (
     upx --best --lzma "dist\beta1installer.exe"
 )
+
+REM Pack the payload into an indexed container shipped next to the exe.
+REM The installer maps it directly, so nothing is unpacked into _MEIPASS.
+REM (Use "python payload.py append dist\beta1installer.exe dist\payload.stp"
+REM  to glue it onto the exe instead - after UPX, never before.)
+if exist "payload\" (
+    python payload.py build payload dist\payload.stp
+) else (
+    mkdir build\payload 2>nul
+    copy /y steam.exe build\payload\steam.exe >nul
+    python payload.py build build\payload dist\payload.stp
+)
@@ -0,0 +1,242 @@
+"""
+calibrate.py – pick the copy buffer size and worker count for the target disk
+Python 3.9
+
+A short probe writes a few MB into the install directory: first with
+each candidate buffer size on one thread, then with the best size on
+more and more threads until adding one stops paying.  Small trials are
+noisy, so a change from the defaults (the first buffer size, one thread)
+has to be GAIN faster to win.  Every trial file is fsynced so the page
+cache can't make a slow disk look fast, and the whole probe stops after
+PROBE_BUDGET seconds – whatever was measured by then decides.  Trials are
+sized to the disk: the first starts at PROBE_START bytes and doubles
+while it is quick, later ones take what the measured rate fits into the
+time left, and a write that runs into the deadline stops there.
+
+Results are cached per file system (keyed by device id) in a small JSON
+file, so later installs to the same disk skip the probe.  The measured
+write bandwidth seeds the progress model's ETA.
+
+    python calibrate.py DIR [--fresh]
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+BUFFER_SIZES  = (1024 * 1024, 256 * 1024, 4 * 1024 * 1024)   # default first
+WORKER_COUNTS = (1, 2, 4, 8)
+PROBE_START   = 512 * 1024        # first trial; doubled while there is time
+PROBE_BYTES   = 8 * 1024 * 1024   # most written per trial
+PROBE_BUDGET  = 2.0               # seconds for the whole probe
+GAIN          = 1.1               # a non-default must be this much faster
+CACHE_DAYS    = 30
+CACHE_ENV     = "STEAM_SETUP_CALIBRATION"
+
+
+class Calibration:
+    """What the probe settled on; *write_rate* in bytes/s, *latency* in s."""
+    __slots__ = ("buffer_size", "workers", "write_rate", "latency", "cached")
+
+    def __init__(self, buffer_size, workers, write_rate, latency, cached=False):
+        self.buffer_size = int(buffer_size)
+        self.workers = int(workers)
+        self.write_rate = float(write_rate)
+        self.latency = float(latency)
+        self.cached = cached
+
+    def to_json(self):
+        return {"buffer_size": self.buffer_size, "workers": self.workers,
+                "write_rate": self.write_rate, "latency": self.latency}
+
+    def __repr__(self):
+        return (f"Calibration(buffer {self.buffer_size >> 10} KiB, "
+                f"{self.workers} workers, {self.write_rate / 1e6:.1f} MB/s, "
+                f"fsync {self.latency * 1e3:.1f} ms"
+                f"{', cached' if self.cached else ''})")
+
+
+# ────────────────────────────────────────────────────────────────
+# Probe
+# ────────────────────────────────────────────────────────────────
+def _write_file(path, block, nbytes, deadline=None):
+    """Write and fsync up to *nbytes*, stopping early at *deadline*."""
+    view = memoryview(block)
+    with open(path, "wb", buffering=0) as f:
+        left = nbytes
+        while left > 0:
+            left -= f.write(view[:min(len(view), left)])
+            if deadline is not None and time.monotonic() > deadline:
+                break
+        os.fsync(f.fileno())
+    os.remove(path)
+    return nbytes - max(left, 0)
+
+
+def _trial(probe_dir, block, threads, nbytes, deadline=None):
+    """Write rate (bytes/s) with *nbytes* split over *threads* files."""
+    share = max(len(block), nbytes // threads)
+    errors = []
+    written = [0] * threads
+
+    def one(i):
+        try:
+            written[i] = _write_file(os.path.join(probe_dir, f"w{threads}_{i}"),
+                                     block, share, deadline)
+        except OSError as e:
+            errors.append(e)
+    t = time.perf_counter()
+    workers = [threading.Thread(target=one, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    if errors:
+        raise errors[0]
+    return sum(written) / max(time.perf_counter() - t, 1e-6)
+
+
+def _fits(rate, deadline):
+    """Trial size that at *rate* takes a quarter of the time left."""
+    left = deadline - time.monotonic()
+    return int(min(PROBE_BYTES, rate * left / 4))
+
+
+def _latency(probe_dir, samples=3):
+    """Median time of a 4 KiB write + fsync – what every small file pays."""
+    block = os.urandom(4096)
+    times = []
+    for i in range(samples):
+        t = time.perf_counter()
+        _write_file(os.path.join(probe_dir, f"lat{i}"), block, len(block))
+        times.append(time.perf_counter() - t)
+    return sorted(times)[len(times) // 2]
+
+
+def probe(probe_dir, budget=PROBE_BUDGET):
+    """Measure the disk behind *probe_dir* (an empty scratch directory)."""
+    deadline = time.monotonic() + budget
+    # random bytes – compressing file systems would flatter zeros
+    block = os.urandom(max(BUFFER_SIZES))
+    latency = _latency(probe_dir)
+
+    # the default on its own, in growing trials until one fills its share
+    best_size = BUFFER_SIZES[0]
+    nbytes = PROBE_START
+    best_rate = _trial(probe_dir, memoryview(block)[:best_size], 1, nbytes,
+                       deadline)
+    while nbytes < PROBE_BYTES and _fits(best_rate, deadline) >= 2 * nbytes:
+        nbytes *= 2
+        best_rate = _trial(probe_dir, memoryview(block)[:best_size], 1, nbytes,
+                           deadline)
+
+    # the rest get what fits; a trial cut short by the deadline doesn't count
+    for size in BUFFER_SIZES[1:]:
+        nbytes = _fits(best_rate, deadline)
+        if nbytes < size:
+            break
+        rate = _trial(probe_dir, memoryview(block)[:size], 1, nbytes, deadline)
+        if time.monotonic() > deadline:
+            break
+        if rate > best_rate * GAIN:
+            best_size, best_rate = size, rate
+
+    workers = 1
+    for n in WORKER_COUNTS[1:]:
+        nbytes = _fits(best_rate, deadline)
+        if nbytes < best_size * n:
+            break
+        rate = _trial(probe_dir, memoryview(block)[:best_size], n, nbytes,
+                      deadline)
+        if time.monotonic() > deadline or rate < best_rate * GAIN:
+            break                           # out of time, or the disk is saturated
+        workers, best_rate = n, rate
+    return Calibration(best_size, workers, best_rate, latency)
+
+
+# ────────────────────────────────────────────────────────────────
+# Per-file-system cache
+# ────────────────────────────────────────────────────────────────
+def cache_path():
+    override = os.environ.get(CACHE_ENV)
+    if override:
+        return override
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "SteamSetup", "calibration.json")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "steam-setup", "calibration.json")
+
+
+def fs_key(path):
+    """Device id of the file system *path* is (or would be) on."""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return str(os.stat(path).st_dev)
+
+
+def _load_cache():
+    try:
+        with open(cache_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _store(key, cal):
+    path = cache_path()
+    cache = _load_cache()
+    cache[key] = dict(cal.to_json(), time=time.time())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=1)
+        os.replace(tmp, path)
+    except OSError:
+        pass                                # no cache – just probe next time
+
+
+def calibrate(target_dir, use_cache=True, budget=PROBE_BUDGET):
+    """
+    Calibration for the disk holding *target_dir* (which must exist),
+    from the cache when it is fresh.  None if the probe couldn't write.
+    """
+    key = fs_key(target_dir)
+    if use_cache:
+        hit = _load_cache().get(key)
+        if hit and time.time() - hit.get("time", 0) < CACHE_DAYS * 86400:
+            try:
+                return Calibration(hit["buffer_size"], hit["workers"],
+                                   hit["write_rate"], hit["latency"], cached=True)
+            except (KeyError, TypeError, ValueError):
+                pass                        # damaged entry – probe again
+    try:
+        probe_dir = tempfile.mkdtemp(prefix=".steam-setup-probe", dir=target_dir)
+    except OSError:
+        return None
+    try:
+        cal = probe(probe_dir, budget)
+    except OSError:
+        return None                         # full or read-only – use defaults
+    finally:
+        shutil.rmtree(probe_dir, ignore_errors=True)
+    _store(key, cal)
+    return cal
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Probe a disk for the installer")
+    ap.add_argument("dir")
+    ap.add_argument("--fresh", action="store_true", help="ignore the cache")
+    args = ap.parse_args()
+    print(calibrate(args.dir, use_cache=not args.fresh))
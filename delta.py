@@ -0,0 +1,59 @@
+"""
+delta.py – block-level binary deltas for upgrade installs
+Python 3.9
+
+A delta turns one exact old version of a file (identified by its hash)
+into the new one by overwriting just the fixed-size blocks that changed
+and truncating/extending to the new size.  It is applied in place, so
+the bytes written are the changed blocks only.
+"""
+
+DELTA_BLOCK = 64 * 1024
+
+
+def diff_blocks(old_path, new_path, block_size=DELTA_BLOCK):
+    """Indexes of the blocks of *new_path* that differ from *old_path*."""
+    changed = []
+    with open(old_path, "rb") as fo, open(new_path, "rb") as fn:
+        i = 0
+        while True:
+            new = fn.read(block_size)
+            if not new:
+                break
+            if fo.read(block_size) != new:
+                changed.append(i)
+            i += 1
+    return changed
+
+
+def literal_length(index, block_size, new_size):
+    """Bytes of new content carried for block *index*."""
+    return min(block_size, new_size - index * block_size)
+
+
+def iter_literals(new_path, blocks, block_size=DELTA_BLOCK):
+    """Yield the new content of each block in *blocks*."""
+    with open(new_path, "rb") as f:
+        for i in blocks:
+            f.seek(i * block_size)
+            yield f.read(block_size)
+
+
+def apply_delta(dst, blocks, literals, block_size, new_size, progress=None):
+    """
+    Patch the file *dst* in place: write each literal at its block offset,
+    then cut the file to *new_size*.  *literals* is a buffer holding the
+    literal blocks back to back.  Returns bytes written.
+    """
+    written = pos = 0
+    with open(dst, "r+b") as f:
+        for i in blocks:
+            n = literal_length(i, block_size, new_size)
+            f.seek(i * block_size)
+            f.write(literals[pos:pos + n])
+            pos += n
+            written += n
+            if progress:
+                progress(n)
+        f.truncate(new_size)
+    return written
@@ -0,0 +1,116 @@
+"""
+dirscan.py – background sub-directory enumeration for the folder browser
+Python 3.9
+
+os.scandir() gives the entry type from the directory read itself (d_type
+on POSIX, the find data on Windows), so telling folders from files costs
+no extra stat per entry.  Results are handed over in batches so a UI can
+show the first rows of a huge (or slow, networked) directory while the
+rest is still being read, and every scan checks *cancelled()* between
+entries so a superseded one stops early.
+
+Finished listings go into a process-wide LRU keyed by path and checked
+against the directory's mtime, so going back up with ".." or reopening
+the dialog costs one stat instead of a listing.  A directory's mtime
+changes whenever an entry is added, removed or renamed in it.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+BATCH_ROWS    = 256          # hand over at least this many rows at once…
+BATCH_SECONDS = 0.05         # …or whatever is there after this long
+CACHE_DIRS    = 512          # listings kept by the LRU
+RACY_SECONDS  = 2.0          # FAT has 2 s mtimes – don't trust a fresher one
+
+
+class ListingCache:
+    """Thread-safe LRU of {path: (mtime_ns, rows)}."""
+    def __init__(self, max_dirs=CACHE_DIRS):
+        self.max_dirs = max_dirs
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, path, mtime_ns):
+        """The cached rows for *path* if it hasn't changed since, else None."""
+        with self._lock:
+            hit = self._entries.get(path)
+            if hit is None or hit[0] != mtime_ns:
+                return None
+            self._entries.move_to_end(path)
+            return hit[1]
+
+    def put(self, path, mtime_ns, rows):
+        # a listing taken in the same mtime tick as a change could miss it
+        if time.time_ns() - mtime_ns < RACY_SECONDS * 1e9:
+            return
+        with self._lock:
+            self._entries[path] = (mtime_ns, rows)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_dirs:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+LISTINGS = ListingCache()
+
+
+def scan_subdirs(path, deliver, cancelled=lambda: False,
+                 batch=BATCH_ROWS, interval=BATCH_SECONDS, cache=LISTINGS):
+    """
+    Call *deliver(rows, done)* with lists of (name, full_path) of the
+    sub-directories of *path* (symlinks followed, like os.path.isdir).
+    The last call has done=True.  An unreadable directory is simply
+    empty; nothing is delivered once *cancelled()* is true.  A listing
+    still valid in *cache* is delivered in one go.
+    """
+    try:
+        # stat before listing: a change during the scan invalidates it
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+    if cache is not None and mtime_ns is not None:
+        rows = cache.get(path, mtime_ns)
+        if rows is not None:
+            if not cancelled():
+                deliver(list(rows), True)
+            return
+
+    found, rows, last = [], [], time.monotonic()
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if cancelled():
+                    return
+                try:
+                    if not entry.is_dir():
+                        continue
+                except OSError:
+                    continue
+                rows.append((entry.name, entry.path))
+                found.append(rows[-1])
+                if len(rows) >= batch or time.monotonic() - last >= interval:
+                    deliver(rows, False)
+                    rows, last = [], time.monotonic()
+    except OSError:
+        mtime_ns = None                   # don't cache a failed listing
+    if cancelled():
+        return
+    if cache is not None and mtime_ns is not None:
+        cache.put(path, mtime_ns, tuple(found))
+    deliver(rows, True)
+
+
+def start_scan(path, deliver, cancelled=lambda: False, cache=LISTINGS):
+    """scan_subdirs() on a daemon thread – a hung share can't block exit."""
+    t = threading.Thread(target=scan_subdirs,
+                         args=(path, deliver, cancelled),
+                         kwargs={"cache": cache},
+                         name="dirscan", daemon=True)
+    t.start()
+    return t
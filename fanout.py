@@ -0,0 +1,220 @@
+"""
+fanout.py – install one payload into many target directories at once
+Python 3.9
+
+For hosts that provision many server instances, each with its own Steam
+directory.  The payload is read, decoded and hashed once; every chunk
+goes to one writer thread per target through a bounded queue.  A slow
+disk holds the reader back instead of piling chunks up in memory, and
+the total time follows the slowest target's write speed rather than
+N × the read cost.
+
+Each target has its own stats and failures and is staged and committed
+like a single install (see install_engine.py).  A target that fails
+(disk full, no permission) is rolled back on its own while the others
+carry on.  Fan-out always installs fresh: no upgrade, resume or dedup.
+"""
+
+import contextlib
+import os
+import queue
+import shutil
+import threading
+
+from buffers import POOL
+from fastcopy import write_all
+from install_engine import (DirectorySource, InstallCancelled, InstallEngine,
+                            load_payload)
+from manifest import new_hasher
+from progress import InstallStats
+from tracing import TRACER
+
+QUEUE_CHUNKS = 8             # chunks a target may fall behind the reader
+
+
+class _Chunk:
+    """Data shared by every writer; its pooled buffer goes back after the last."""
+    __slots__ = ("data", "buf", "pool", "left", "lock")
+
+    def __init__(self, data, buf, pool, writers):
+        self.data, self.buf, self.pool = data, buf, pool
+        self.left = writers
+        self.lock = threading.Lock()
+
+    def done(self):
+        with self.lock:
+            self.left -= 1
+            last = not self.left
+        if last and self.buf is not None:
+            self.pool.release(self.buf)
+
+
+class Target:
+    """
+    One destination directory: its stats, its writer queue and how it
+    went.  *error* is the OSError that stopped it; *failures* lists
+    files that failed verification as (path, expected, actual).
+    """
+    def __init__(self, manifest, target_dir, stats, depth=QUEUE_CHUNKS):
+        self.dir = target_dir
+        self.stats = stats
+        self.error = None
+        self.failures = []
+        self.created = not os.path.isdir(target_dir)
+        # the single-target engine owns the stage/commit/rollback layout
+        self._layout = InstallEngine(manifest, None, target_dir, stats=stats)
+        self._queue = queue.Queue(depth)
+        self._thread = None
+
+    @property
+    def ok(self):
+        return self.error is None and not self.failures
+
+    def _prepare(self):
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            shutil.rmtree(self._layout.stage_dir, ignore_errors=True)
+            self._layout._make_dirs(self._layout.stage_dir)
+        except OSError as e:
+            self.error = e
+
+    def _write(self):
+        f = None
+        while True:
+            kind, entry, item = self._queue.get()
+            if kind == "end":
+                break
+            try:
+                if self.error is not None:
+                    continue                      # just drain
+                if kind == "open":
+                    f = open(entry.target(self._layout.stage_dir), "wb",
+                             buffering=0)
+                    self.stats.file_started(entry)
+                elif kind == "data":
+                    write_all(f, item.data)
+                    self.stats.advance(len(item.data), entry)
+                else:                             # close; item = digest read
+                    f.close()
+                    f = None
+                    self._closed(entry, item)
+            except OSError as e:
+                self.error = e
+            finally:
+                if kind == "data":
+                    item.done()
+        if f is not None:                         # cancelled mid-file
+            f.close()
+
+    def _closed(self, entry, digest):
+        dst = entry.target(self._layout.stage_dir)
+        if digest is not None and digest != entry.hash:
+            os.remove(dst)
+            self.failures.append((entry.path, entry.hash, digest))
+            return
+        if entry.mtime is not None:
+            os.utime(dst, (entry.mtime, entry.mtime))
+        self.stats.file_finished(entry)
+
+    def _finish(self, commit):
+        if commit and self.ok:
+            try:
+                self._layout._commit()
+                self.stats.finish()
+                return
+            except OSError as e:
+                self.error = e
+        self._layout._rollback(self.created)
+
+
+class FanoutEngine:
+    """
+    Copy every file of *manifest* from *source* into each of *targets*.
+    *stats* is a list with one stats object per target (InstallStats by
+    default).  run() returns the Target objects.  Only a cancel or an
+    unreadable source raises; every target is then rolled back.
+    """
+    def __init__(self, manifest, source, targets, stats=None, verify=True,
+                 pool=None, depth=QUEUE_CHUNKS):
+        self.manifest = manifest
+        self.source = DirectorySource(source) if isinstance(source, str) else source
+        stats = stats or [InstallStats() for _ in targets]
+        self.targets = [Target(manifest, d, s, depth)
+                        for d, s in zip(targets, stats)]
+        self.verify = verify
+        self.pool = pool or POOL
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        for t in self.targets:
+            t.stats.begin(self.manifest)
+            t._prepare()
+            t._thread = threading.Thread(target=t._write, daemon=True,
+                                         name=f"fanout {t.dir}")
+            t._thread.start()
+        try:
+            with TRACER.span("fanout.read", "install", targets=len(self.targets)):
+                for entry in self.manifest:
+                    if self._cancel.is_set():
+                        raise InstallCancelled()
+                    if all(t.error for t in self.targets):
+                        break                     # nobody left to write for
+                    with TRACER.span(entry.path, "file", size=entry.size):
+                        self._fan(entry)
+        except BaseException:
+            self._stop(commit=False)
+            raise
+        self._stop(commit=True)
+        return self.targets
+
+    def _stop(self, commit):
+        self._put(("end", None, None))
+        for t in self.targets:
+            t._thread.join()
+        for t in self.targets:
+            t._finish(commit)
+
+    def _put(self, item):
+        # blocks while the slowest target is QUEUE_CHUNKS behind – backpressure
+        for t in self.targets:
+            t._queue.put(item)
+
+    def _fan(self, entry):
+        hasher = (new_hasher(self.manifest.algo)
+                  if self.verify and entry.hash else None)
+        self._put(("open", entry, None))
+        for data, buf in self._chunks(entry):
+            if hasher:
+                hasher.update(data)
+            self._put(("data", entry,
+                       _Chunk(data, buf, self.pool, len(self.targets))))
+            if self._cancel.is_set():
+                raise InstallCancelled()
+        self._put(("close", entry, hasher.hexdigest() if hasher else None))
+
+    def _chunks(self, entry):
+        """(data, pooled buffer or None) pieces of *entry*'s content."""
+        if not isinstance(self.source, DirectorySource):
+            # stored entries come as slices of the container's mapping
+            chunks = self.source.iter_chunks(entry, step=self.pool.buffer_size)
+            with contextlib.closing(chunks):
+                for data in chunks:
+                    yield data, None
+            return
+        with open(entry.target(self.source.root), "rb") as f:
+            while True:
+                buf = self.pool.acquire()
+                n = f.readinto(buf)
+                if not n:
+                    self.pool.release(buf)
+                    return
+                yield memoryview(buf)[:n], buf
+
+
+def make_fanout(targets, stats=None, payload=None, **options):
+    """FanoutEngine for the bundled (or given) payload."""
+    manifest, source = load_payload(payload)
+    return FanoutEngine(manifest, source, targets, stats=stats, **options)
@@ -0,0 +1,171 @@
+"""
+fastcopy.py – file copy engine used by the Steam Setup wizard
+Python 3.9
+
+Uses the kernel copy paths (copy_file_range, sendfile) where the platform
+has them and falls back to readinto() into pooled buffers (buffers.py)
+everywhere else.  When a *hasher* is passed the data has to be seen
+anyway, so the readinto() loop is used and every buffer is hashed on its
+way through.
+
+materialize() makes a second copy of a file that is already on the
+target disk: a reflink (FICLONE – shared extents, no data written) where
+the file system has them, else a hard link if the caller allows it, else
+a plain copy.
+"""
+
+import errno
+import os
+import sys
+
+from buffers import POOL
+
+# ────────────────────────────────────────────────────────────────
+# Tunables
+# ────────────────────────────────────────────────────────────────
+KERNEL_STEP = 8 * 1024 * 1024       # bytes handed to one copy_file_range/sendfile
+
+# errors that mean "this syscall can't do this pair of files", not "disk broke"
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF,
+                    errno.EOPNOTSUPP, errno.EPERM, errno.ETXTBSY,
+                    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP)}
+
+FICLONE = 0x40049409                # linux/fs.h _IOW(0x94, 9, int)
+
+_HAVE_CFR      = hasattr(os, "copy_file_range")
+# file→file sendfile is a Linux-ism; BSD/macOS want a socket as the target
+_HAVE_SENDFILE = hasattr(os, "sendfile") and sys.platform.startswith("linux")
+
+
+def write_all(f, data):
+    """f.write() until all of *data* is out – raw files may write short."""
+    view = memoryview(data)
+    while view:
+        n = f.write(view)
+        view = view[n:]
+
+
+def _kernel_loop(call, fsrc, fdst, pos, total, progress):
+    """Drive *call(src_fd, dst_fd, offset, count)* until EOF. Returns new pos."""
+    sfd, dfd = fsrc.fileno(), fdst.fileno()
+    while pos < total:
+        n = call(sfd, dfd, pos, min(KERNEL_STEP, total - pos))
+        if n == 0:                       # source shrank under us
+            break
+        pos += n
+        if progress:
+            progress(n)
+    return pos
+
+
+def _cfr(sfd, dfd, off, count):
+    return os.copy_file_range(sfd, dfd, count, off, off)
+
+
+def _sendfile(sfd, dfd, off, count):
+    # sendfile only takes an input offset – the output fd must be positioned
+    os.lseek(dfd, off, os.SEEK_SET)
+    return os.sendfile(dfd, sfd, off, count)
+
+
+def hash_prefix(f, length, hasher, pool=POOL):
+    """Feed bytes [0, length) of the open file *f* to *hasher*."""
+    f.seek(0)
+    with pool.borrow() as view:
+        while length:
+            n = f.readinto(view[:min(len(view), length)])
+            if not n:
+                raise OSError(f"{getattr(f, 'name', 'file')}: shorter than {length} bytes")
+            hasher.update(view[:n])
+            length -= n
+
+
+def copy_stream(fsrc, fdst, total, progress=None, pos=0, hasher=None, pool=POOL):
+    """
+    Copy bytes [pos, total) of open binary file *fsrc* into *fdst* at the
+    same offsets.  *progress(n)* is called with every chunk length and
+    *hasher* (if any) is updated with every chunk.  Returns the number of
+    bytes copied.  User-space copies go through a buffer from *pool*.
+    """
+    start = pos
+    for enabled, call in ((_HAVE_CFR, _cfr), (_HAVE_SENDFILE, _sendfile)):
+        if hasher or not enabled or pos >= total:
+            continue
+        try:
+            pos = _kernel_loop(call, fsrc, fdst, pos, total, progress)
+            return pos - start
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS:
+                raise
+            # anything already copied stays copied; continue from pos
+
+    # ── plain user-space loop ───────────────────────────────────────
+    fsrc.seek(pos)
+    fdst.seek(pos)
+    with pool.borrow() as view:
+        while True:
+            n = fsrc.readinto(view)
+            if not n:
+                break
+            if hasher:
+                hasher.update(view[:n])
+            write_all(fdst, view[:n])
+            pos += n
+            if progress:
+                progress(n)
+    return pos - start
+
+
+def copy_file(src, dst, progress=None, offset=0, hasher=None, pool=POOL):
+    """
+    Copy file *src* to *dst*.  Returns bytes copied.  *progress(n)*
+    receives byte deltas once they have reached the OS (dst is unbuffered).
+    With *offset* the first *offset* bytes of *dst* are kept and the copy
+    resumes from there; a *hasher* then sees that prefix first.
+    """
+    with open(src, "rb") as fsrc, \
+         open(dst, "r+b" if offset else "wb", buffering=0) as fdst:
+        if offset:
+            fdst.truncate(offset)
+            if hasher:
+                hash_prefix(fdst, offset, hasher, pool)
+        total = os.fstat(fsrc.fileno()).st_size
+        return copy_stream(fsrc, fdst, total, progress, pos=offset,
+                           hasher=hasher, pool=pool)
+
+
+def clone_file(src, dst):
+    """Reflink *src* to a new *dst*.  False if the file system can't."""
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return True
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS | {errno.ENOTTY}:
+                raise
+    os.remove(dst)
+    return False
+
+
+def materialize(src, dst, link=False, progress=None, hasher=None, pool=POOL):
+    """
+    Give *dst* the content of *src* (both on the target disk) as cheaply as
+    the file system allows.  Returns ("clone" | "link" | "copy", bytes
+    written).  A *hasher* only sees data on the copy path.
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)
+    if clone_file(src, dst):
+        return "clone", 0
+    if link:
+        try:
+            os.link(src, dst)
+            return "link", 0
+        except OSError as e:
+            if e.errno not in _FALLBACK_ERRNOS | {errno.EMLINK}:
+                raise
+    return "copy", copy_file(src, dst, progress=progress, hasher=hasher,
+                             pool=pool)
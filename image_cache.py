@@ -0,0 +1,75 @@
+"""
+image_cache.py – decode-once PhotoImage cache shared by the wizard's windows
+Python 3.9 / Tkinter
+
+Images are keyed by (resource, size) per Tk root: the first request
+decodes, every later one gets the same PhotoImage.  A root's entries are
+dropped when that root is destroyed, which also frees the Tk images.
+"""
+
+import tkinter as tk
+
+# {id(root): {(resource, size): PhotoImage or None}}
+_CACHES = {}
+
+
+def _cache_for(master):
+    root = master._root()
+    key = id(root)
+    cache = _CACHES.get(key)
+    if cache is None:
+        cache = _CACHES[key] = {}
+
+        def released(e):
+            if e.widget is root:
+                _CACHES.pop(key, None)
+        root.bind("<Destroy>", released, add="+")
+    return cache
+
+
+def get_image(master, resource, size, load):
+    """
+    The cached image for (*resource*, *size*) on *master*'s root, created
+    by *load(root)* on first use.  *load* may return None (image not
+    available); that answer is cached too.
+    """
+    cache = _cache_for(master)
+    key = (resource, size)
+    if key not in cache:
+        cache[key] = load(master._root())
+    return cache[key]
+
+
+def gif_data(master, name, b64, fallback="#808080"):
+    """Image from an embedded base-64 GIF; a flat *fallback* square if it won't decode."""
+    def load(root):
+        try:
+            return tk.PhotoImage(master=root, data="".join(b64.split()))
+        except tk.TclError:
+            img = tk.PhotoImage(master=root, width=16, height=16)
+            img.put(fallback, to=(0, 0, 15, 15))
+            return img
+    return get_image(master, name, (16, 16), load)
+
+
+def image_file(master, path, size):
+    """
+    Image file scaled to *size* (w, h), or None if it can't be loaded.
+    Tk reads PNG/GIF itself when the file already has that size; PIL is
+    only imported when scaling is needed.
+    """
+    def load(root):
+        try:
+            img = tk.PhotoImage(master=root, file=path)
+            if (img.width(), img.height()) == tuple(size):
+                return img
+        except tk.TclError:
+            pass
+        try:
+            from PIL import Image, ImageTk
+            with Image.open(path) as im:
+                return ImageTk.PhotoImage(im.resize(size, Image.NEAREST),
+                                          master=root)
+        except (ImportError, OSError, ValueError):
+            return None
+    return get_image(master, path, tuple(size), load)
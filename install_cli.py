@@ -0,0 +1,205 @@
+"""
+install_cli.py – headless Steam install with a machine-readable progress stream
+Python 3.9
+
+    beta1installer --silent --target DIR [--target DIR ...] [--payload PATH]
+                  [--no-verify] [--no-tune] [--no-resume] [--hardlinks]
+                  [--buffer-mb N] [--trace PATH]
+
+Runs the same engine as the wizards, with no display, and writes one JSON
+object per line to stdout.  With more than one --target the payload is
+read once and written to every target (see fanout.py); each event then
+carries a "target" field and every target succeeds or fails on its own.
+
+    {"event": "start",    "target": ..., "files_total": ..., "bytes_total": ...}
+    {"event": "progress", "bytes_done": ..., "files_done": ..., "rate": ..., "eta": ...}
+    {"event": "done",     ...final counters...}
+    {"event": "error",    "message": ..., "failures": [...], "kept": ...}
+    {"event": "cancelled"}                 Ctrl+C / SIGTERM – target unchanged
+
+Exit status is 0 on success, 1 on failure (of any target), 2 on bad
+arguments, 130 when cancelled.
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+
+from buffers import BufferPool
+from fanout import make_fanout
+from install_engine import (INSTALL_ERRORS, InstallCancelled, VerificationError,
+                            make_engine)
+from progress import ProgressModel
+from tracing import TRACER
+
+# snapshot keys that make it onto the stream
+_FIELDS = ("bytes_done", "bytes_total", "bytes_written", "files_done",
+           "files_total", "elapsed", "rate", "eta", "files_per_sec",
+           "copy_rate", "hash_rate", "current")
+
+
+class EventStream:
+    """
+    Thread-safe NDJSON writer.  If the reader goes away (broken pipe) the
+    events are dropped – the install itself carries on.
+    """
+    def __init__(self, out):
+        self._out = out
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        line = json.dumps(dict(event=event, **fields), separators=(",", ":"))
+        with self._lock:
+            if self._out is None:
+                return
+            try:
+                self._out.write(line + "\n")
+                self._out.flush()
+            except BrokenPipeError:
+                # keep the interpreter's own final flush from failing too
+                devnull = os.open(os.devnull, os.O_WRONLY)
+                try:
+                    os.dup2(devnull, self._out.fileno())
+                except (OSError, ValueError):
+                    pass
+                os.close(devnull)
+                self._out = None
+
+    def progress(self, snap, **extra):
+        self.emit("done" if snap["finished"] else "progress", **extra,
+                  **{k: snap[k] for k in _FIELDS})
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(prog="beta1installer",
+                                 description="Install Steam without a UI.")
+    ap.add_argument("--silent", action="store_true",
+                    help="run without a window (required)")
+    ap.add_argument("--target", required=True, metavar="DIR", action="append",
+                    help="installation directory (repeat to install into several)")
+    ap.add_argument("--payload", metavar="PATH",
+                    help="payload container or directory (default: bundled)")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--no-verify", action="store_true",
+                    help="skip hash verification")
+    ap.add_argument("--no-tune", action="store_true",
+                    help="skip the disk probe (see calibrate.py)")
+    ap.add_argument("--no-resume", action="store_true",
+                    help="don't journal the run; a failure leaves nothing behind")
+    ap.add_argument("--hardlinks", action="store_true",
+                    help="install identical files as hard links of each other")
+    ap.add_argument("--buffer-mb", type=int, default=None, metavar="N",
+                    help="cap on copy buffer memory (default 64, "
+                         "or $STEAM_SETUP_BUFFER_MB)")
+    ap.add_argument("--trace", metavar="PATH",
+                    help="write a Chrome trace of the run to PATH "
+                         "(and a summary to PATH.txt)")
+    ap.add_argument("--max-hz", type=float, default=10.0,
+                    help="progress events per second (default 10)")
+    args = ap.parse_args(argv)
+    if not args.silent:
+        ap.error("--silent is required")
+    return args
+
+
+def _failures(failures):
+    return [{"path": p, "expected": exp, "actual": act}
+            for p, exp, act in failures]
+
+
+def _cancel_on_signals(cancel):
+    def handler(_signum=None, _frame=None):
+        cancel()
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, handler)
+        signal.signal(signal.SIGTERM, handler)
+
+
+def _close_source(engine):
+    close = getattr(engine.source, "close", None)
+    if close:
+        close()
+
+
+def main(argv=None, out=None):
+    args = parse_args(argv)
+    TRACER.enable(args.trace)
+    events = EventStream(out or sys.stdout)
+    pool = BufferPool(args.buffer_mb * 1024 * 1024) if args.buffer_mb else None
+    if len(args.target) > 1:
+        return _fanout(args, events, pool)
+
+    target = args.target[0]
+    model = ProgressModel(on_update=events.progress, max_hz=args.max_hz)
+    try:
+        engine = make_engine(target, stats=model, payload=args.payload,
+                             workers=args.workers, verify=not args.no_verify,
+                             links=args.hardlinks, pool=pool,
+                             tune=not args.no_tune, resume=not args.no_resume)
+    except INSTALL_ERRORS as e:
+        events.emit("error", message=f"no usable payload: {e}", failures=[])
+        return 1
+
+    events.emit("start", target=target, files_total=len(engine.manifest),
+                bytes_total=engine.manifest.total_size)
+    _cancel_on_signals(engine.cancel)
+    try:
+        engine.run()
+    except InstallCancelled:
+        events.emit("cancelled")
+        return 130
+    except INSTALL_ERRORS as e:
+        failures = (_failures(e.failures)
+                    if isinstance(e, VerificationError) else [])
+        # kept: staging dir left for the next run to resume from, or null
+        events.emit("error", message=str(e), failures=failures,
+                    kept=engine.kept)
+        return 1
+    finally:
+        _close_source(engine)
+    return 0
+
+
+def _fanout(args, events, pool):
+    """Several --target: one read of the payload, one writer per target."""
+    models = [ProgressModel(on_update=lambda snap, d=d: events.progress(snap, target=d),
+                            max_hz=args.max_hz)
+              for d in args.target]
+    try:
+        engine = make_fanout(args.target, stats=models, payload=args.payload,
+                             verify=not args.no_verify, pool=pool)
+    except INSTALL_ERRORS as e:
+        events.emit("error", message=f"no usable payload: {e}", failures=[])
+        return 1
+
+    for d in args.target:
+        events.emit("start", target=d, files_total=len(engine.manifest),
+                    bytes_total=engine.manifest.total_size)
+    _cancel_on_signals(engine.cancel)
+    try:
+        targets = engine.run()
+    except InstallCancelled:
+        events.emit("cancelled")
+        return 130
+    except INSTALL_ERRORS as e:
+        events.emit("error", message=str(e), failures=[])
+        return 1
+    finally:
+        _close_source(engine)
+    for t in targets:
+        if t.error is not None:
+            events.emit("error", target=t.dir, message=str(t.error), failures=[])
+        elif t.failures:
+            events.emit("error", target=t.dir,
+                        message=f"{len(t.failures)} file(s) failed verification",
+                        failures=_failures(sorted(t.failures)))
+    return 0 if all(t.ok for t in targets) else 1
+
+
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,518 @@
+"""
+install_engine.py – manifest-driven copy engine behind the Setup wizard
+Python 3.9
+
+Big files are streamed one after another on a dedicated lane (one long
+sequential stream is what spinning disks and network shares like best);
+small files are grouped into batches and spread over a thread pool.
+
+In upgrade mode files already in the target are checked first: same size
+and mtime, or same hash, means nothing to do; a known older version is
+patched with the block delta shipped in the payload; anything else is
+copied in full.  The patch goes into a staged reflink of the installed
+file; without reflinks (ext4, NTFS) that stage is a full local copy and
+its bytes count as written.
+
+With *resume* an InstallJournal in the target records finished files and
+committed offsets, so a run that was killed picks up where it stopped.
+
+With *verify* every copied file is hashed on the same buffers that are
+written and checked against the manifest; mismatches are collected and
+reported together in a VerificationError once the other files are done.
+
+Files with the same content (hash and size) are fetched from the source
+once; the other copies are made on the target disk afterwards by reflink,
+hard link (only with *links*, since linked files change together) or a
+local copy – see fastcopy.materialize().
+
+Files are written into a staging directory inside the target (same file
+system) and only moved over the real files by rename once every file is
+in place and verified.  cancel() is checked between buffers, so a cancel
+lands within one buffer per lane; it drops the staging directory and
+leaves the target exactly as it was.
+"""
+
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+
+from buffers import POOL, BufferPool
+from calibrate import calibrate
+from fastcopy import clone_file, copy_file, materialize
+from journal import InstallJournal, manifest_id
+from manifest import MANIFEST_NAME, Manifest, hash_file, new_hasher
+from payload import PAYLOAD_NAME, PayloadError, PayloadReader, locate_payload
+from progress import InstallStats
+from resources import resource_path
+from tracing import TRACER
+
+STREAM_THRESHOLD = 32 * 1024 * 1024   # files at least this big go to the stream lane
+BATCH_FILES      = 64                 # small-file batch limits
+BATCH_BYTES      = 8 * 1024 * 1024
+MTIME_SLACK      = 2.0                # seconds – FAT stores mtimes at 2 s resolution
+PREFIX_CHECK     = 1024 * 1024        # tail of a resumed prefix compared to the source
+STAGE_NAME       = ".steam-setup.stage"
+
+
+def default_workers():
+    return min(8, (os.cpu_count() or 1) + 2)
+
+
+# ────────────────────────────────────────────────────────────────
+# Sources – anything with copy(entry, dst, progress) can feed the engine
+# (payload.PayloadReader is the other one)
+# ────────────────────────────────────────────────────────────────
+class DirectorySource:
+    """Payload laid out as plain files below *root*."""
+    def __init__(self, root):
+        self.root = root
+
+    def copy(self, entry, dst, progress=None, offset=0, hasher=None, pool=POOL):
+        return copy_file(entry.target(self.root), dst, progress=progress,
+                         offset=offset, hasher=hasher, pool=pool)
+
+    def read_range(self, entry, start, length):
+        with open(entry.target(self.root), "rb") as f:
+            f.seek(start)
+            return f.read(length)
+
+
+# ────────────────────────────────────────────────────────────────
+# Verification
+# ────────────────────────────────────────────────────────────────
+class VerificationError(Exception):
+    """Files whose content did not match the manifest hash."""
+    def __init__(self, failures):
+        self.failures = failures            # [(path, expected, actual), ...]
+        lines = [f"{p}: expected {exp[:16]}…, got {act[:16]}…"
+                 for p, exp, act in failures]
+        super().__init__(f"{len(failures)} file(s) failed verification:\n"
+                         + "\n".join(lines))
+
+
+class InstallCancelled(Exception):
+    """The install was cancelled; the target directory is unchanged."""
+    def __init__(self):
+        super().__init__("installation cancelled")
+
+
+class _TimedHasher:
+    """Hasher wrapper that books the time spent hashing into the stats."""
+    def __init__(self, algo, stats):
+        self._h = new_hasher(algo)
+        self._stats = stats
+
+    def update(self, data):
+        t = time.perf_counter()
+        self._h.update(data)
+        self._stats.hashed(len(data), time.perf_counter() - t)
+
+    def hexdigest(self):
+        return self._h.hexdigest()
+
+
+# ────────────────────────────────────────────────────────────────
+# Scheduling
+# ────────────────────────────────────────────────────────────────
+def plan(entries, threshold=STREAM_THRESHOLD,
+         batch_files=BATCH_FILES, batch_bytes=BATCH_BYTES):
+    """
+    Split *entries* into (stream, batches): the big files in descending
+    size order, and the small files packed into bounded batches.
+    """
+    stream = sorted((e for e in entries if e.size >= threshold),
+                    key=lambda e: e.size, reverse=True)
+    small = sorted((e for e in entries if e.size < threshold),
+                   key=lambda e: e.size, reverse=True)
+    batches, cur, cur_bytes = [], [], 0
+    for e in small:
+        if cur and (len(cur) >= batch_files or cur_bytes + e.size > batch_bytes):
+            batches.append(cur)
+            cur, cur_bytes = [], 0
+        cur.append(e)
+        cur_bytes += e.size
+    if cur:
+        batches.append(cur)
+    return stream, batches
+
+
+def dedup(entries):
+    """(unique entries, [(duplicate, first entry with that content)])."""
+    first, unique, dups = {}, [], []
+    for e in entries:
+        key = (e.hash, e.size) if e.hash else None
+        primary = first.get(key) if key else None
+        if primary is None:
+            if key:
+                first[key] = e
+            unique.append(e)
+        else:
+            dups.append((e, primary))
+    return unique, dups
+
+
+class InstallEngine:
+    """
+    Copy every file of *manifest* from *source* into *target_dir*.
+    *source* is a source object or a plain directory path.  *upgrade*
+    reuses whatever is already in *target_dir* where it can; *resume*
+    journals the run so an interrupted install can be continued; *verify*
+    checks every copied file against its manifest hash; *links* lets
+    duplicate files be hard links of one another.  Every user-space buffer
+    comes from *pool* (buffers.POOL by default), which caps the memory the
+    copy needs.  *tune* probes the target disk first (see calibrate.py)
+    for the buffer size and worker count not given explicitly, and seeds
+    the ETA of a ProgressModel with the measured bandwidth.  cancel() may
+    be called from any thread; run() then raises InstallCancelled.  A
+    failed run is rolled back the same way unless it is resumable: then
+    the staged files and the journal stay for the next run and *kept*
+    names the staging directory.
+    """
+
+    def __init__(self, manifest, source, target_dir, workers=None,
+                 stream_threshold=STREAM_THRESHOLD, stats=None, upgrade=False,
+                 resume=False, verify=True, links=False, pool=None,
+                 tune=False):
+        self.manifest = manifest
+        self.source = DirectorySource(source) if isinstance(source, str) else source
+        self.target_dir = target_dir
+        self.stage_dir = os.path.join(target_dir, STAGE_NAME)
+        self.workers = workers or default_workers()
+        self.stream_threshold = stream_threshold
+        self.stats = stats or InstallStats()
+        self.upgrade = upgrade
+        self.resume = resume
+        self.verify = verify
+        self.links = links
+        self.pool = pool or POOL
+        self.tune = tune
+        self._tunable = (workers is None, pool is None)
+        self.journal = None
+        self.kept = None                # stage left for a resume after a failure
+        self.failures = []
+        self._failed = threading.Event()
+        self._cancel = threading.Event()
+        self._fail_lock = threading.Lock()
+        self._ready = {}                # path ➜ file holding its final content
+
+    def cancel(self):
+        """Stop as soon as every lane finishes its current buffer."""
+        self._cancel.set()
+
+    def _check_cancel(self):
+        if self._cancel.is_set():
+            raise InstallCancelled()
+
+    def run(self):
+        created = not os.path.isdir(self.target_dir)
+        os.makedirs(self.target_dir, exist_ok=True)
+        if self.tune:
+            self._tune()
+        self.stats.begin(self.manifest)
+        if self.resume:
+            self.journal = InstallJournal(self.target_dir,
+                                          manifest_id(self.manifest))
+        if not (self.journal and self.journal.resumed):
+            # staged files of some other, abandoned run
+            shutil.rmtree(self.stage_dir, ignore_errors=True)
+        try:
+            self._make_dirs(self.stage_dir)
+            with TRACER.span("install.copy", "install", files=len(self.manifest)):
+                self._run_lanes()
+            if self.failures:
+                raise VerificationError(sorted(self.failures))
+            self._check_cancel()
+            with TRACER.span("install.commit", "install"):
+                self._commit()
+        except InstallCancelled:
+            with TRACER.span("install.rollback", "install"):
+                self._rollback(created)
+            raise
+        except BaseException:
+            if self.journal:
+                # what is staged and journalled is where the next run resumes
+                self.journal.close()
+                self.kept = self.stage_dir
+            else:
+                with TRACER.span("install.rollback", "install"):
+                    self._rollback(created)
+            raise
+        if self.journal:
+            self.journal.close(remove=True)
+        self.stats.finish()
+        return self.stats.snapshot()
+
+    def _tune(self):
+        with TRACER.span("install.calibrate", "install"):
+            cal = calibrate(self.target_dir)
+        if cal is None:
+            return
+        auto_workers, auto_pool = self._tunable
+        if auto_workers:
+            self.workers = cal.workers
+        if auto_pool:
+            self.pool = BufferPool(POOL.max_bytes, cal.buffer_size)
+        seed = getattr(self.stats, "seed_rate", None)
+        if seed:
+            seed(cal.write_rate)
+
+    def _commit(self):
+        """Move every staged file over its target – renames only, no data."""
+        self._make_dirs(self.target_dir)
+        for e in self.manifest:
+            try:
+                os.replace(e.target(self.stage_dir), e.target(self.target_dir))
+            except FileNotFoundError:
+                pass        # left as it was (upgrade) or moved before a crash
+        shutil.rmtree(self.stage_dir, ignore_errors=True)
+
+    def _rollback(self, created):
+        if self.journal:
+            self.journal.close(remove=True)
+        shutil.rmtree(self.stage_dir, ignore_errors=True)
+        if created:
+            try:
+                os.rmdir(self.target_dir)
+            except OSError:
+                pass
+
+    def _run_lanes(self):
+        unique, dups = dedup(self.manifest)
+        stream, batches = plan(unique, self.stream_threshold)
+        self._run_pool(([stream] if stream else []) + batches, self._copy_lane,
+                       extra=bool(stream))
+        # duplicates once their originals are on disk
+        self._run_pool([dups[i:i + BATCH_FILES]
+                        for i in range(0, len(dups), BATCH_FILES)],
+                       self._dup_lane)
+
+    def _run_pool(self, lanes, fn, extra=0):
+        if not lanes:
+            return
+        with ThreadPoolExecutor(max_workers=self.workers + extra,
+                                thread_name_prefix="install") as pool:
+            futures = [pool.submit(fn, lane) for lane in lanes]
+            try:
+                done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            except BaseException:
+                self._cancel.set()          # e.g. Ctrl+C – don't wait for the lanes
+                raise
+            for f in done:
+                if f.exception():
+                    self._failed.set()
+                    for p in pending:
+                        p.cancel()
+                    raise f.exception()
+
+    def _make_dirs(self, root):
+        os.makedirs(root, exist_ok=True)
+        for d in self.manifest.directories():
+            try:
+                os.mkdir(os.path.join(root, *d.split("/")))
+            except FileExistsError:
+                pass
+
+    def _copy_lane(self, entries):
+        for e in entries:
+            if self._failed.is_set():
+                return
+            self._check_cancel()
+            with TRACER.span(e.path, "file", size=e.size):
+                self._copy_one(e)
+
+    def _dup_lane(self, pairs):
+        for e, primary in pairs:
+            if self._failed.is_set():
+                return
+            self._check_cancel()
+            with TRACER.span(e.path, "file", size=e.size, dup=True):
+                self._copy_one(e, primary)
+
+    def _copy_one(self, entry, primary=None):
+        """Install *entry*; a duplicate comes from *primary*'s file when it can."""
+        stats, journal = self.stats, self.journal
+        stats.file_started(entry)
+        final = entry.target(self.target_dir)
+        dst = entry.target(self.stage_dir)
+        if (journal and entry.path in journal.done
+                and entry.size in (_size(dst), _size(final))):
+            self._ready[entry.path] = dst if _size(dst) == entry.size else final
+            stats.advance(entry.size, entry, written=0)
+            stats.file_finished(entry)
+            return
+
+        linked = False
+        offset = self._resume_offset(entry, dst) if journal else 0
+        if offset:
+            stats.advance(offset, entry, written=0)
+        if offset or not (self.upgrade and self._upgrade_in_place(entry, final, dst)):
+            src = self._ready.get(primary.path) if primary and not offset else None
+            cursor = (journal.cursor(entry.path, dst, offset)
+                      if journal and not src else None)
+            hasher = (_TimedHasher(self.manifest.algo, stats)
+                      if self.verify and entry.hash else None)
+            cancel = self._cancel
+
+            def progress(n):
+                if cancel.is_set():
+                    raise InstallCancelled()
+                stats.advance(n, entry)
+                if cursor:
+                    cursor.advance(n)
+
+            if src:
+                how, _ = materialize(src, dst, self.links, progress, hasher,
+                                     self.pool)
+                if how != "copy":
+                    # shares the already verified original's data
+                    stats.advance(entry.size, entry, written=0)
+                    hasher = None
+                    linked = how == "link"
+            else:
+                self.source.copy(entry, dst, progress=progress, offset=offset,
+                                 hasher=hasher, pool=self.pool)
+            if hasher and hasher.hexdigest() != entry.hash:
+                self._verify_failed(entry, dst, hasher.hexdigest())
+                return
+        # an unchanged upgrade file has nothing staged – it stays the original
+        ready = dst if os.path.exists(dst) else final
+        if entry.mtime is not None and not linked:   # a link has its original's
+            os.utime(ready, (entry.mtime, entry.mtime))
+        self._ready[entry.path] = ready
+        if journal:
+            journal.file_done(entry.path)
+        stats.file_finished(entry)
+
+    def _verify_failed(self, entry, dst, actual):
+        # a bad file must not survive to be trusted by a later upgrade/resume
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        with self._fail_lock:
+            self.failures.append((entry.path, entry.hash, actual))
+
+    def _resume_offset(self, entry, dst):
+        """Committed offset of a partly written *dst* whose prefix still checks out."""
+        offset = self.journal.partial.get(entry.path, 0)
+        if not 0 < offset <= entry.size or _size(dst) < offset:
+            return 0
+        n = min(offset, PREFIX_CHECK)
+        with open(dst, "rb") as f:
+            f.seek(offset - n)
+            mine = f.read(n)
+        return offset if mine == self.source.read_range(entry, offset - n, n) else 0
+
+    def _upgrade_in_place(self, entry, final, dst):
+        """
+        Reuse the installed *final* cheaply: unchanged means nothing to
+        stage, a known older version is patched into the staged *dst*.
+        False = copy it in full.
+        """
+        try:
+            st = os.stat(final)
+        except FileNotFoundError:
+            return False
+        if (st.st_size == entry.size and entry.mtime is not None
+                and abs(st.st_mtime - entry.mtime) <= MTIME_SLACK):
+            self.stats.advance(entry.size, entry, written=0)
+            return True
+        if not entry.hash:
+            return False
+
+        algo = self.manifest.algo
+
+        def check(_n):                      # big files take a while – stay cancellable
+            self._check_cancel()
+        current = hash_file(final, algo, self.pool, progress=check)
+        if current == entry.hash:
+            self.stats.advance(entry.size, entry, written=0)
+            return True
+        delta_for = getattr(self.source, "delta_for", None)
+        delta = delta_for(entry, current) if delta_for else None
+        if delta is None:
+            return False
+        # patch a copy so the installed file stays intact until the commit:
+        # a reflink shares its extents, anywhere else it is a full copy
+        if os.path.lexists(dst):
+            os.remove(dst)
+        copied = 0
+        if not clone_file(final, dst):
+            copied = copy_file(final, dst, progress=check, pool=self.pool)
+        written = copied + self.source.apply(delta, dst)
+        if hash_file(dst, algo, self.pool, progress=check) != entry.hash:
+            return False                    # patched into garbage – recopy
+        self.stats.advance(entry.size, entry, written=written)
+        return True
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return -1
+
+
+# ────────────────────────────────────────────────────────────────
+# Front-end glue – shared by the Tk wizard, the pywin32 wizard and the
+# silent command line
+# ────────────────────────────────────────────────────────────────
+def load_payload(path=None):
+    """
+    (manifest, source) for the payload.  *path* names a container file or
+    a payload directory explicitly; otherwise look, in this order, for a
+    container appended to the frozen .exe, payload.stp next to the
+    program, a payload/ tree with a manifest.json, the lone steam.exe.
+    """
+    if path:
+        if os.path.isdir(path):
+            manifest_path = os.path.join(path, MANIFEST_NAME)
+            manifest = (Manifest.load(manifest_path)
+                        if os.path.isfile(manifest_path) else Manifest.build(path))
+            return manifest, path
+        reader = PayloadReader(path)
+        return reader.manifest, reader
+
+    frozen = getattr(sys, "frozen", False)
+    here = os.path.dirname(os.path.abspath(sys.executable if frozen else __file__))
+    reader = locate_payload(sys.executable if frozen else None,
+                            os.path.join(here, PAYLOAD_NAME),
+                            resource_path(PAYLOAD_NAME))
+    if reader is not None:
+        return reader.manifest, reader
+
+    payload_dir = resource_path("payload")
+    manifest_path = os.path.join(payload_dir, MANIFEST_NAME)
+    if os.path.isfile(manifest_path):
+        return Manifest.load(manifest_path), payload_dir
+    return Manifest.single(resource_path("steam.exe")), resource_path("")
+
+
+# what a front end should catch around make_engine()/run() and report
+INSTALL_ERRORS = (OSError, ValueError, PayloadError, VerificationError)
+# (InstallCancelled is not an error – front ends handle it on its own)
+
+
+def describe_failure(exc, engine=None):
+    """The message a wizard shows for *exc* raised by make_engine()/run()."""
+    msg = str(exc) or type(exc).__name__
+    if engine is not None and engine.kept:
+        msg += ("\n\nThe files installed so far were kept; run Setup again "
+                "to continue where it stopped.")
+    return msg
+
+
+def make_engine(target_dir, stats=None, payload=None, **options):
+    """
+    Engine for the bundled (or given) payload with the front-end defaults:
+    upgrade in place, resumable, verified, tuned to the target disk.
+    """
+    manifest, source = load_payload(payload)
+    options.setdefault("upgrade", True)
+    options.setdefault("resume", True)
+    options.setdefault("verify", True)
+    options.setdefault("tune", True)
+    return InstallEngine(manifest, source, target_dir, stats=stats, **options)
@@ -0,0 +1,151 @@
+"""
+journal.py – on-disk install journal so an interrupted install can resume
+Python 3.9
+
+The journal is a JSON-lines file in the target directory:
+
+    {"payload": "<id>"}                 first line – which payload this is
+    {"done": "bin/steam.dll"}           file fully written
+    {"partial": "gcf/big.gcf", "offset": 201326592}
+                                        bytes [0, offset) are on disk for good
+
+Before a partial offset is recorded the data file is fsync'd, so a
+recorded offset is always backed by durable bytes.  Records are written
+at most every COMMIT_BYTES / COMMIT_SECONDS, which bounds both the
+journal overhead and the work lost to a crash.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+JOURNAL_NAME   = ".steam-setup.journal"
+COMMIT_BYTES   = 64 * 1024 * 1024
+COMMIT_SECONDS = 2.0
+
+
+def manifest_id(manifest):
+    """Stable id of a payload, so a journal is never applied to another one."""
+    data = json.dumps(manifest.to_json(), sort_keys=True).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def _fsync_path(path):
+    fd = os.open(path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class InstallJournal:
+    """
+    Journal for one install into *target_dir*.  After construction
+    *done* (set of paths) and *partial* ({path: offset}) describe what the
+    previous, interrupted run left behind; *resumed* says whether there
+    was anything.
+    """
+    def __init__(self, target_dir, payload_id,
+                 commit_bytes=COMMIT_BYTES, commit_seconds=COMMIT_SECONDS):
+        self.path = os.path.join(target_dir, JOURNAL_NAME)
+        self.payload_id = payload_id
+        self.commit_bytes = commit_bytes
+        self.commit_seconds = commit_seconds
+        self.done, self.partial = set(), {}
+        self._lock = threading.Lock()
+        self._pending_done = []
+        self._last_flush = time.monotonic()
+
+        self._load()
+        self.resumed = bool(self.done or self.partial)
+        self._f = open(self.path, "a" if self.resumed else "w", encoding="utf-8")
+        if not self.resumed:
+            self._write({"payload": payload_id})
+            self._sync()
+
+    def _load(self):
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for n, line in enumerate(f):
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break                     # torn last line – ignore the tail
+                if n == 0:
+                    if rec.get("payload") != self.payload_id:
+                        return                # journal of another payload
+                elif "done" in rec:
+                    self.done.add(rec["done"])
+                    self.partial.pop(rec["done"], None)
+                elif "partial" in rec:
+                    self.partial[rec["partial"]] = rec["offset"]
+
+    def _write(self, rec):
+        self._f.write(json.dumps(rec, separators=(",", ":")) + "\n")
+
+    def _sync(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._last_flush = time.monotonic()
+
+    # ── recording ──────────────────────────────────────────────────
+    def file_done(self, path):
+        """Record *path* as complete; flushed with the next commit."""
+        with self._lock:
+            self._pending_done.append(path)
+            if time.monotonic() - self._last_flush >= self.commit_seconds:
+                self._flush_done()
+
+    def _flush_done(self):
+        for p in self._pending_done:
+            self._write({"done": p})
+        self._pending_done.clear()
+        self._sync()
+
+    def commit(self, path, dst, offset):
+        """Make bytes [0, offset) of *dst* durable and record them."""
+        _fsync_path(dst)
+        with self._lock:
+            for p in self._pending_done:
+                self._write({"done": p})
+            self._pending_done.clear()
+            self._write({"partial": path, "offset": offset})
+            self._sync()
+
+    def cursor(self, path, dst, offset=0):
+        return _Cursor(self, path, dst, offset)
+
+    def close(self, remove=False):
+        """Flush what is pending; *remove* deletes the journal (install done)."""
+        with self._lock:
+            if self._f.closed:
+                return
+            if self._pending_done:
+                self._flush_done()
+            self._f.close()
+        if remove:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class _Cursor:
+    """Per-file progress hook that commits the offset at bounded intervals."""
+    def __init__(self, journal, path, dst, offset):
+        self.journal, self.path, self.dst = journal, path, dst
+        self.offset = self._committed = offset
+        self._t = time.monotonic()
+
+    def advance(self, n):
+        self.offset += n
+        j = self.journal
+        if (self.offset - self._committed >= j.commit_bytes
+                or time.monotonic() - self._t >= j.commit_seconds):
+            j.commit(self.path, self.dst, self.offset)
+            self._committed, self._t = self.offset, time.monotonic()
@@ -0,0 +1,168 @@
+"""
+manifest.py – payload manifest for the Steam Setup wizard
+Python 3.9
+
+A manifest lists every file of a payload as (relative path, size, hash)
+plus the mtime the installer stamps on it, which lets an upgrade spot
+untouched files without hashing them.  Paths are stored with forward
+slashes and are always relative to the payload root.
+
+The hash algorithm is any hashlib name (sha256 by default, blake2b is
+faster on CPUs without SHA extensions) or, when the packages are installed,
+an xxhash algorithm (xxh3_128, xxh64) or blake3.
+
+    python manifest.py build PAYLOAD_DIR [ALGO]  # writes PAYLOAD_DIR/manifest.json
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+from buffers import POOL
+
+MANIFEST_NAME = "manifest.json"
+HASH_ALGO     = "sha256"
+
+
+def new_hasher(algo=HASH_ALGO):
+    """hashlib-style object (update/hexdigest) for *algo*."""
+    if algo in hashlib.algorithms_available:
+        return hashlib.new(algo)
+    if algo.startswith("xxh"):
+        import xxhash
+        return getattr(xxhash, algo)()
+    if algo == "blake3":
+        from blake3 import blake3
+        return blake3()
+    raise ValueError(f"unknown hash algorithm {algo!r}")
+
+
+def hash_file(path, algo=HASH_ALGO, pool=POOL, progress=None):
+    """
+    Hex digest of the file at *path*.  *progress(n)* is called after each
+    buffer and may raise to stop early.
+    """
+    h = new_hasher(algo)
+    with open(path, "rb") as f, pool.borrow() as view:
+        while True:
+            n = f.readinto(view)
+            if not n:
+                break
+            h.update(view[:n])
+            if progress:
+                progress(n)
+    return h.hexdigest()
+
+
+def _check_rel(path):
+    """Reject absolute paths and anything that climbs out of the root."""
+    parts = path.split("/")
+    if (not path or path.startswith("/") or ":" in parts[0]
+            or any(p in ("", ".", "..") for p in parts) or "\\" in path):
+        raise ValueError(f"bad payload path: {path!r}")
+    return path
+
+
+class ManifestEntry:
+    __slots__ = ("path", "size", "hash", "mtime")
+
+    def __init__(self, path, size, hash=None, mtime=None):
+        self.path = _check_rel(path)
+        self.size = int(size)
+        self.hash = hash
+        self.mtime = mtime
+
+    def target(self, root):
+        """Absolute destination of this entry below *root*."""
+        return os.path.join(root, *self.path.split("/"))
+
+    def to_json(self):
+        d = {"path": self.path, "size": self.size, "hash": self.hash}
+        if self.mtime is not None:
+            d["mtime"] = self.mtime
+        return d
+
+    def __repr__(self):
+        return f"ManifestEntry({self.path!r}, {self.size})"
+
+
+class Manifest:
+    def __init__(self, entries, algo=HASH_ALGO):
+        self.entries = list(entries)
+        self.algo = algo
+
+    @property
+    def total_size(self):
+        return sum(e.size for e in self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def directories(self):
+        """Every directory the payload needs, parents before children."""
+        dirs = set()
+        for e in self.entries:
+            parts = e.path.split("/")[:-1]
+            for i in range(1, len(parts) + 1):
+                dirs.add(tuple(parts[:i]))
+        return ["/".join(d) for d in sorted(dirs, key=lambda d: (len(d), d))]
+
+    # ── (de)serialisation ──────────────────────────────────────────
+    @classmethod
+    def from_json(cls, data):
+        if data.get("version", 1) != 1:
+            raise ValueError(f"unsupported manifest version {data['version']}")
+        return cls([ManifestEntry(f["path"], f["size"], f.get("hash"),
+                                  f.get("mtime"))
+                    for f in data["files"]],
+                   data.get("algo", HASH_ALGO))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_json(json.load(f))
+
+    def to_json(self):
+        return {"version": 1, "algo": self.algo,
+                "files": [e.to_json() for e in self.entries]}
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, indent=1)
+
+    # ── builders ───────────────────────────────────────────────────
+    @classmethod
+    def build(cls, root, algo=HASH_ALGO):
+        """Scan the directory *root* and hash every file in it."""
+        entries = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                full = os.path.join(dirpath, name)
+                rel = os.path.relpath(full, root).replace(os.sep, "/")
+                if rel == MANIFEST_NAME:
+                    continue
+                st = os.stat(full)
+                entries.append(ManifestEntry(rel, st.st_size,
+                                             hash_file(full, algo),
+                                             st.st_mtime))
+        return cls(entries, algo)
+
+    @classmethod
+    def single(cls, path, name=None):
+        """Manifest for a lone file (the classic steam.exe-only payload)."""
+        name = name or os.path.basename(path)
+        return cls([ManifestEntry(name, os.path.getsize(path))])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4) or sys.argv[1] != "build":
+        raise SystemExit("usage: manifest.py build PAYLOAD_DIR [ALGO]")
+    root = sys.argv[2]
+    m = Manifest.build(root, *sys.argv[3:])
+    m.save(os.path.join(root, MANIFEST_NAME))
+    print(f"{len(m)} files, {m.total_size} bytes")
@@ -0,0 +1,658 @@
+"""
+payload.py – seekable, indexed payload container for the Steam Setup wizard
+Python 3.9
+
+Layout (all integers little-endian):
+
+    [entry data ...][index: UTF-8 JSON][trailer]
+    trailer = MAGIC (8 bytes) | index offset (u64) | index length (u64)
+
+Offsets in the index and trailer are relative to the start of the
+container, so the same bytes work as a stand-alone payload.stp file or
+appended to the end of the installer executable.  The reader maps the
+file with mmap and copies entries straight out of the mapping – nothing
+is extracted to a temp directory first.
+
+Entries are stored raw, as one zlib/lzma stream, or – for big payloads –
+as independently compressed blocks ("zlib-blocks", "lzma-blocks" and, when
+the zstandard package is installed, "zstd-blocks").  Block entries are
+decoded by a process pool and written back in order; one reader never
+holds more than a fixed number of decoded blocks, however many files
+are being copied at once.
+
+Content is stored once per unique blob: a file whose hash and size match
+one already written gets an index entry pointing at the same bytes.
+Readers need nothing special for that; the install engine notices the
+shared hash and materializes the copies locally (see install_engine.py).
+
+An upgrade container can also carry block deltas (see delta.py) against
+the files of an older release, keyed by the hash of that old file.
+
+    python payload.py build SRC_DIR OUT [--compress MODE] [--base OLD_DIR]
+    python payload.py append EXE PAYLOAD
+    python payload.py list PAYLOAD
+"""
+
+import contextlib
+import json
+import lzma
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from delta import DELTA_BLOCK, apply_delta, diff_blocks, iter_literals
+from buffers import POOL
+from fastcopy import hash_prefix, write_all
+from manifest import HASH_ALGO, Manifest, ManifestEntry, hash_file, new_hasher
+
+MAGIC        = b"STPAYLD1"
+_TRAILER     = struct.Struct("<8sQQ")
+PAYLOAD_NAME = "payload.stp"
+COMPRESSIONS = ("none", "zlib", "lzma",
+                "zlib-blocks", "lzma-blocks", "zstd-blocks")
+BLOCK_SIZE   = 4 * 1024 * 1024
+
+_IO_STEP     = 8 * 1024 * 1024
+
+
+class PayloadError(Exception):
+    pass
+
+
+class PayloadEntry(ManifestEntry):
+    """Manifest entry plus where (and how) its bytes live in the container."""
+    __slots__ = ("offset", "length", "compression", "blocks")
+
+    def __init__(self, path, size, hash, offset, length, compression="none",
+                 blocks=None, mtime=None):
+        super().__init__(path, size, hash, mtime)
+        self.offset = int(offset)
+        self.length = int(length)
+        if compression not in COMPRESSIONS:
+            raise PayloadError(f"{path}: unknown compression {compression!r}")
+        self.compression = compression
+        self.blocks = ([(int(c), int(r)) for c, r in blocks]
+                       if blocks is not None else None)
+        if compression.endswith("-blocks"):
+            if (sum(c for c, _ in self.blocks or ()) != self.length
+                    or sum(r for _, r in self.blocks or ()) != self.size):
+                raise PayloadError(f"{path}: block table does not add up")
+
+    def to_json(self):
+        d = super().to_json()
+        d.update(offset=self.offset, length=self.length,
+                 compression=self.compression)
+        if self.blocks is not None:
+            d["blocks"] = self.blocks
+        return d
+
+
+class DeltaEntry:
+    """Block delta turning the file hashed *base_hash* into entry *path*."""
+    __slots__ = ("path", "base_hash", "offset", "length", "block_size",
+                 "new_size", "blocks")
+
+    def __init__(self, path, base_hash, offset, length, block_size,
+                 new_size, blocks):
+        self.path = path
+        self.base_hash = base_hash
+        self.offset = int(offset)
+        self.length = int(length)
+        self.block_size = int(block_size)
+        self.new_size = int(new_size)
+        self.blocks = [int(i) for i in blocks]
+
+    def to_json(self):
+        return {"path": self.path, "base_hash": self.base_hash,
+                "offset": self.offset, "length": self.length,
+                "block_size": self.block_size, "new_size": self.new_size,
+                "blocks": self.blocks}
+
+
+def _decompressor(kind):
+    return zlib.decompressobj() if kind == "zlib" else lzma.LZMADecompressor()
+
+
+def _compressor(kind):
+    return zlib.compressobj(6) if kind == "zlib" else lzma.LZMACompressor()
+
+
+# what the codecs raise on damaged input; zstd's error is added by _zstd()
+_CODEC_ERRORS = [zlib.error, lzma.LZMAError, EOFError]
+
+
+def _inflate(kind, view, step):
+    """Decode a whole-entry stream, never holding more than *step* output."""
+    try:
+        yield from _inflate_stream(kind, view, step)
+    except tuple(_CODEC_ERRORS) as e:
+        raise PayloadError(f"corrupt {kind} stream: {e}") from None
+
+
+def _inflate_stream(kind, view, step):
+    dec = _decompressor(kind)
+    for i in range(0, len(view), step):
+        buf = view[i:i + step]
+        while True:
+            data = dec.decompress(buf, step)
+            if data:
+                yield data
+            if kind == "zlib":
+                buf = dec.unconsumed_tail
+                if not buf:
+                    break
+            else:
+                if dec.eof or dec.needs_input:
+                    break
+                buf = b""
+    if kind == "zlib":
+        tail = dec.flush()
+        if tail:
+            yield tail
+    if not dec.eof:
+        raise PayloadError(f"truncated {kind} stream")
+
+
+# ── independent-block codecs ───────────────────────────────────
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise PayloadError("zstd-blocks needs the zstandard package")
+    if zstandard.ZstdError not in _CODEC_ERRORS:
+        _CODEC_ERRORS.append(zstandard.ZstdError)
+    return zstandard
+
+
+def block_compress(kind, data):
+    if kind == "zlib":
+        return zlib.compress(data, 6)
+    if kind == "lzma":
+        return lzma.compress(data, preset=6)
+    return _zstd().ZstdCompressor(level=3).compress(data)
+
+
+def block_decompress(kind, data, raw_len):
+    try:
+        if kind == "zlib":
+            out = zlib.decompress(data, bufsize=max(raw_len, 1))
+        elif kind == "lzma":
+            out = lzma.decompress(data)
+        else:
+            out = _zstd().ZstdDecompressor().decompress(data,
+                                                        max_output_size=raw_len)
+    except tuple(_CODEC_ERRORS) as e:
+        raise PayloadError(f"corrupt {kind} block: {e}") from None
+    if len(out) != raw_len:
+        raise PayloadError(f"block decoded to {len(out)} bytes, expected {raw_len}")
+    return out
+
+
+_worker_maps = {}          # path -> mmap, one per pool process
+
+
+def _decode_block(path, start, length, kind, raw_len):
+    """Pool worker: read one block from the container and decode it."""
+    mm = _worker_maps.get(path)
+    if mm is None:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        _worker_maps[path] = mm
+    return block_decompress(kind, mm[start:start + length], raw_len)
+
+
+def _skip(chunks, n):
+    """Drop the first *n* bytes of a chunk stream."""
+    for chunk in chunks:
+        if n >= len(chunk):
+            n -= len(chunk)
+            continue
+        yield chunk[n:] if n else chunk
+        n = 0
+
+
+def _ordered(pool, fn, jobs, window, slots=None):
+    """
+    pool.map() that keeps at most *window* jobs in flight.  With *slots*
+    (a semaphore shared by several of these) each job also holds a slot
+    until the caller has used its result, which bounds them all together.
+    Iterators sharing *slots* must each be consumed by their own thread –
+    one that waits for a slot relies on the others moving on.
+    """
+    pending = deque()
+    held = 0                              # our slots not yet given back
+
+    def give_back():
+        nonlocal held
+        if held:
+            held -= 1
+            slots.release()
+
+    try:
+        for args in jobs:
+            if slots is not None:
+                # with nothing of ours in flight wait for a slot; otherwise
+                # hand back our oldest result first, so lanes can't deadlock
+                while not slots.acquire(blocking=not pending):
+                    yield pending.popleft().result()
+                    give_back()
+                held += 1
+            pending.append(pool.submit(fn, *args))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+                give_back()
+        while pending:
+            yield pending.popleft().result()
+            give_back()
+    finally:
+        for f in pending:
+            f.cancel()
+        while held:
+            give_back()
+
+
+# ────────────────────────────────────────────────────────────────
+# Writer
+# ────────────────────────────────────────────────────────────────
+class PayloadWriter:
+    """
+    Stream files into a container.  *append=True* adds the container to the
+    end of an existing file (e.g. the built installer .exe).
+    """
+    def __init__(self, path, append=False, algo=HASH_ALGO,
+                 block_size=BLOCK_SIZE, processes=1):
+        self._f = open(path, "ab" if append else "wb")
+        self._base = self._f.tell()
+        self.algo = algo
+        self.block_size = block_size
+        self._pool = ProcessPoolExecutor(processes) if processes > 1 else None
+        self._window = 2 * processes
+        self.entries = []
+        self.deltas = []
+        self._blobs = {}                 # (hash, size) ➜ entry that stores it
+        self._sizes = set()
+
+    def _pos(self):
+        return self._f.tell() - self._base
+
+    def add_file(self, src, rel, compression="none", digest=None):
+        """
+        Store *src* as *rel*.  *digest* (its hash, if already known) saves
+        re-reading a file that may be a duplicate.
+        """
+        if compression not in COMPRESSIONS:
+            raise PayloadError(f"unknown compression {compression!r}")
+        st = os.stat(src)
+        if digest is None and st.st_size in self._sizes:
+            digest = hash_file(src, self.algo)     # only same-size files can match
+        blob = self._blobs.get((digest, st.st_size)) if digest else None
+        if blob is not None:
+            entry = PayloadEntry(rel, blob.size, blob.hash, blob.offset,
+                                 blob.length, blob.compression, blob.blocks,
+                                 st.st_mtime)
+            self.entries.append(entry)
+            return entry
+
+        if compression.endswith("-blocks"):
+            entry = self._add_blocks(src, rel, compression[:-len("-blocks")])
+        else:
+            entry = self._add_stream(src, rel, compression)
+        self._blobs[(entry.hash, entry.size)] = entry
+        self._sizes.add(entry.size)
+        return entry
+
+    def _add_stream(self, src, rel, compression):
+        offset = self._pos()
+        h = new_hasher(self.algo)
+        size = 0
+        comp = _compressor(compression) if compression != "none" else None
+        mtime = os.stat(src).st_mtime
+        with open(src, "rb") as f, POOL.borrow() as view:
+            while True:
+                n = f.readinto(view)
+                if not n:
+                    break
+                data = view[:n]
+                h.update(data)
+                size += n
+                self._f.write(comp.compress(data) if comp else data)
+        if comp:
+            self._f.write(comp.flush())
+        entry = PayloadEntry(rel, size, h.hexdigest(), offset,
+                             self._pos() - offset, compression, mtime=mtime)
+        self.entries.append(entry)
+        return entry
+
+    def _add_blocks(self, src, rel, kind):
+        offset = self._pos()
+        h = new_hasher(self.algo)
+        blocks = []
+
+        def raw_blocks(f):
+            while True:
+                data = f.read(self.block_size)
+                if not data:
+                    return
+                h.update(data)
+                blocks.append([0, len(data)])
+                yield (kind, data)
+
+        mtime = os.stat(src).st_mtime
+        with open(src, "rb") as f:
+            if self._pool:
+                packed = _ordered(self._pool, block_compress, raw_blocks(f),
+                                  self._window)
+            else:
+                packed = (block_compress(*job) for job in raw_blocks(f))
+            for i, comp in enumerate(packed):
+                blocks[i][0] = len(comp)
+                self._f.write(comp)
+        entry = PayloadEntry(rel, sum(r for _, r in blocks), h.hexdigest(),
+                             offset, self._pos() - offset, kind + "-blocks",
+                             blocks, mtime)
+        self.entries.append(entry)
+        return entry
+
+    def add_delta(self, old, new, rel, block_size=DELTA_BLOCK):
+        """Store the blocks of *new* that differ from the older file *old*."""
+        blocks = diff_blocks(old, new, block_size)
+        offset = self._pos()
+        for data in iter_literals(new, blocks, block_size):
+            self._f.write(data)
+        d = DeltaEntry(rel, hash_file(old, self.algo), offset,
+                       self._pos() - offset, block_size,
+                       os.path.getsize(new), blocks)
+        self.deltas.append(d)
+        return d
+
+    def close(self):
+        index = json.dumps({"version": 1, "algo": self.algo,
+                            "entries": [e.to_json() for e in self.entries],
+                            "deltas": [d.to_json() for d in self.deltas]},
+                           separators=(",", ":")).encode("utf-8")
+        index_off = self._pos()
+        self._f.write(index)
+        self._f.write(_TRAILER.pack(MAGIC, index_off, len(index)))
+        self._f.close()
+        if self._pool:
+            self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_payload(src_dir, out, compression="none", append=False, processes=1,
+                  base_dir=None, algo=HASH_ALGO):
+    """
+    Pack every file below *src_dir* into the container *out*.  With
+    *base_dir* (the previous release) changed files also get a delta.
+    """
+    files = Manifest.build(src_dir, algo).entries
+    with PayloadWriter(out, append=append, algo=algo, processes=processes) as w:
+        for e in files:
+            w.add_file(e.target(src_dir), e.path, compression, digest=e.hash)
+        if base_dir:
+            for e in files:
+                old = e.target(base_dir)
+                if os.path.isfile(old) and hash_file(old, w.algo) != e.hash:
+                    w.add_delta(old, e.target(src_dir), e.path)
+    return w.entries
+
+
+# ────────────────────────────────────────────────────────────────
+# Reader
+# ────────────────────────────────────────────────────────────────
+class PayloadReader:
+    """
+    Memory-mapped view of a container; also acts as an install source.
+    Block-compressed entries are decoded by up to *processes* worker
+    processes (default: one per CPU, 1 = decode inline).  However many
+    files are read at once, at most 2 × *processes* decoded blocks are
+    in flight or waiting to be written.
+    """
+
+    def __init__(self, path, processes=None):
+        self.path = os.path.abspath(path)
+        self.processes = processes or os.cpu_count() or 1
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(2 * self.processes)
+        self._f = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:                       # empty file
+            self._f.close()
+            raise PayloadError(f"{path}: not a payload container")
+        try:
+            self._load_index()
+        except Exception:
+            self.close()
+            raise
+
+    @classmethod
+    def find(cls, path):
+        """Reader for *path* if it carries a container, else None."""
+        try:
+            return cls(path)
+        except (OSError, PayloadError):
+            return None
+
+    def _load_index(self):
+        mm = self._mm
+        if len(mm) < _TRAILER.size:
+            raise PayloadError(f"{self.path}: not a payload container")
+        magic, index_off, index_len = _TRAILER.unpack_from(mm, len(mm) - _TRAILER.size)
+        if magic != MAGIC:
+            raise PayloadError(f"{self.path}: not a payload container")
+        self.base = len(mm) - _TRAILER.size - index_len - index_off
+        if self.base < 0:
+            raise PayloadError(f"{self.path}: corrupt container trailer")
+        start = self.base + index_off
+        try:
+            data = json.loads(bytes(mm[start:start + index_len]).decode("utf-8"))
+            if data.get("version") != 1:
+                raise PayloadError(f"{self.path}: unsupported container version")
+            self.entries = [PayloadEntry(e["path"], e["size"], e["hash"],
+                                         e["offset"], e["length"],
+                                         e.get("compression", "none"),
+                                         e.get("blocks"), e.get("mtime"))
+                            for e in data["entries"]]
+            self.deltas = {}
+            for d in data.get("deltas", ()):
+                d = DeltaEntry(d["path"], d["base_hash"], d["offset"],
+                               d["length"], d["block_size"], d["new_size"],
+                               d["blocks"])
+                self.deltas.setdefault(d.path, []).append(d)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            # unparsable JSON, bad UTF-8, missing or mistyped fields
+            raise PayloadError(
+                f"{self.path}: corrupt container index ({e})") from None
+        for e in self.entries + [d for ds in self.deltas.values() for d in ds]:
+            if e.offset < 0 or e.offset + e.length > index_off:
+                raise PayloadError(f"{self.path}: entry {e.path} out of bounds")
+        self.manifest = Manifest(self.entries, data.get("algo", HASH_ALGO))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        if getattr(self, "_mm", None) is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                # a slice is still alive (say, in a traceback being handled);
+                # the mapping is unmapped when the last one goes
+                pass
+            self._mm = None
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def raw(self, entry):
+        """memoryview of the stored (possibly compressed) bytes of *entry*."""
+        start = self.base + entry.offset
+        return memoryview(self._mm)[start:start + entry.length]
+
+    def iter_chunks(self, entry, step=_IO_STEP, start=0):
+        """
+        Yield the decoded content of *entry*, from byte *start* on, in
+        pieces of about *step*.
+        """
+        view = self.raw(entry)
+        try:
+            if entry.compression == "none":
+                for i in range(start, len(view), step):
+                    yield view[i:i + step]
+                return
+            if entry.compression.endswith("-blocks"):
+                yield from self._iter_blocks(entry, start)
+            else:
+                yield from _skip(_inflate(entry.compression, view, step), start)
+        except PayloadError as e:
+            raise PayloadError(f"{entry.path}: {e}") from None
+        finally:
+            view.release()
+
+    def read_range(self, entry, start, length):
+        """*length* decoded bytes of *entry* from *start* (short at EOF)."""
+        out = bytearray()
+        with contextlib.closing(self.iter_chunks(entry, start=start)) as chunks:
+            for chunk in chunks:
+                out += chunk[:length - len(out)]
+                if len(out) >= length:
+                    break
+        return bytes(out)
+
+    def _decode_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.processes)
+            return self._pool
+
+    def _iter_blocks(self, entry, skip=0):
+        kind = entry.compression[:-len("-blocks")]
+        jobs, start = [], self.base + entry.offset
+        for clen, rlen in entry.blocks or ():
+            if not jobs and skip >= rlen:   # wholly before the resume point
+                skip -= rlen
+            else:
+                jobs.append((self.path, start, clen, kind, rlen))
+            start += clen
+        if self.processes <= 1 or len(jobs) < 2:
+            blocks = (block_decompress(kind, self._mm[s:s + clen], rlen)
+                      for _, s, clen, _, rlen in jobs)
+        else:
+            # the slots are shared by every file being copied, so memory
+            # stays bounded by 2 × processes decoded blocks in total
+            blocks = _ordered(self._decode_pool(), _decode_block, jobs,
+                              2 * self.processes, self._slots)
+        with contextlib.closing(blocks):  # hand the slots back if abandoned
+            yield from _skip(blocks, skip)
+
+    def delta_for(self, entry, base_hash):
+        """Delta that upgrades the file hashed *base_hash* to *entry*, or None."""
+        for d in self.deltas.get(entry.path, ()):
+            if d.base_hash == base_hash and d.new_size == entry.size:
+                return d
+        return None
+
+    def apply(self, delta, dst, progress=None):
+        """Patch *dst* in place with *delta*.  Returns bytes written."""
+        view = self.raw(delta)
+        try:
+            return apply_delta(dst, delta.blocks, view, delta.block_size,
+                               delta.new_size, progress)
+        finally:
+            view.release()
+
+    def copy(self, entry, dst, progress=None, offset=0, hasher=None, pool=POOL):
+        """
+        Write the content of *entry* to the file *dst*; with *offset* keep
+        that many bytes already in *dst* and write only the rest.  *hasher*
+        is fed the whole file content on the way through.  Stored entries
+        are written straight from the mapping; *pool* is only needed to
+        re-hash a kept prefix.
+        """
+        with open(dst, "r+b" if offset else "wb", buffering=0) as f:
+            if offset:
+                f.truncate(offset)
+                if hasher:
+                    hash_prefix(f, offset, hasher, pool)
+                f.seek(offset)
+            # closing() ends the generator – and its hold on the mapping –
+            # even when progress() raises InstallCancelled mid-file
+            with contextlib.closing(self.iter_chunks(entry, start=offset)) as chunks:
+                try:
+                    for chunk in chunks:
+                        if hasher:
+                            hasher.update(chunk)
+                        write_all(f, chunk)
+                        if progress:
+                            progress(len(chunk))
+                finally:
+                    chunk = None          # not kept alive by the traceback
+
+
+def locate_payload(*candidates):
+    """First of *candidates* (paths) that holds a container, as a reader."""
+    for path in candidates:
+        if path and os.path.isfile(path):
+            reader = PayloadReader.find(path)
+            if reader is not None:
+                return reader
+    return None
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Steam Setup payload containers")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="pack a directory into a container")
+    b.add_argument("src_dir")
+    b.add_argument("out")
+    b.add_argument("--compress", default="none", choices=COMPRESSIONS)
+    b.add_argument("--base", metavar="OLD_DIR",
+                   help="previous release; add deltas for changed files")
+    b.add_argument("--algo", default=HASH_ALGO,
+                   help="content hash (sha256, blake2b, xxh3_128, blake3)")
+    a = sub.add_parser("append", help="glue a container onto an executable")
+    a.add_argument("exe")
+    a.add_argument("payload")
+    ls = sub.add_parser("list", help="show the index of a container")
+    ls.add_argument("payload")
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        entries = build_payload(args.src_dir, args.out, args.compress,
+                                processes=os.cpu_count() or 1,
+                                base_dir=args.base, algo=args.algo)
+        print(f"{len(entries)} files → {args.out}")
+    elif args.cmd == "append":
+        with open(args.exe, "ab") as exe, open(args.payload, "rb") as pl:
+            while True:
+                data = pl.read(_IO_STEP)
+                if not data:
+                    break
+                exe.write(data)
+    else:
+        with PayloadReader(args.payload) as r:
+            stored = set()
+            for e in r.entries:
+                kind = "dup" if e.size and e.offset in stored else e.compression
+                if e.size:                    # an empty file shares the next offset
+                    stored.add(e.offset)
+                print(f"{e.size:>12} {kind:>11} {e.path}")
+            for ds in r.deltas.values():
+                for d in ds:
+                    print(f"{d.length:>12} {'delta':>11} {d.path}")
@@ -0,0 +1,185 @@
+"""
+progress.py – install progress counters, throughput and time-remaining model
+Python 3.9
+
+InstallStats is the raw, thread-safe tally the engine feeds.  ProgressModel
+adds a smoothed throughput, a time-remaining estimate and publishes at a
+capped rate so that a UI (or a log) never sees more than *max_hz* updates
+per second however small the copy steps are.
+"""
+
+import math
+import threading
+import time
+
+MAX_HZ     = 30.0        # publish ceiling
+EWMA_TAU   = 3.0         # seconds – time constant of the throughput average
+ETA_WARMUP = 0.5         # don't guess a time remaining before this many seconds
+
+
+class InstallStats:
+    """
+    Thread-safe counters the engine feeds while it works.
+    *on_change()* (optional) is called after every update, from the
+    worker thread that caused it.
+    """
+    def __init__(self, on_change=None):
+        self._lock = threading.Lock()
+        self.on_change = on_change
+        self.bytes_total = self.files_total = 0
+        self.bytes_done = self.files_done = 0
+        self.bytes_written = 0              # < bytes_done when an upgrade skips work
+        self.hash_bytes = 0
+        self.hash_seconds = 0.0             # time spent inside hasher.update()
+        self.current = None                 # ManifestEntry shown as "current"
+        self.current_done = 0
+        self.started = None
+        self.finished = False
+
+    def begin(self, manifest):
+        with self._lock:
+            self.bytes_total = manifest.total_size
+            self.files_total = len(manifest)
+            self.started = time.monotonic()
+        self._changed()
+
+    def file_started(self, entry):
+        with self._lock:
+            self.current, self.current_done = entry, 0
+        self._changed()
+
+    def advance(self, n, entry=None, written=None):
+        """
+        *n* more bytes of the payload are in place; *written* (default *n*)
+        of them actually had to be written.
+        """
+        with self._lock:
+            self.bytes_done += n
+            self.bytes_written += n if written is None else written
+            if entry is self.current:
+                self.current_done += n
+        self._changed()
+
+    def hashed(self, n, seconds):
+        with self._lock:
+            self.hash_bytes += n
+            self.hash_seconds += seconds
+
+    def file_finished(self, entry):
+        with self._lock:
+            self.files_done += 1
+        self._changed()
+
+    def finish(self):
+        with self._lock:
+            self.finished = True
+        self._changed()
+
+    def _changed(self):
+        if self.on_change:
+            self.on_change()
+
+    def _snapshot_locked(self):
+        elapsed = time.monotonic() - self.started if self.started else 0.0
+        cur = self.current
+        return {
+            "bytes_done":    self.bytes_done,
+            "bytes_total":   self.bytes_total,
+            "bytes_written": self.bytes_written,
+            "files_done":    self.files_done,
+            "files_total":   self.files_total,
+            "elapsed":       elapsed,
+            "bytes_per_sec": self.bytes_done / elapsed if elapsed else 0.0,
+            "files_per_sec": self.files_done / elapsed if elapsed else 0.0,
+            # copy_rate is wall-clock; hash_rate is what hashing alone manages,
+            # so hash_rate near copy_rate × threads means hashing is the limit
+            "copy_rate":     self.bytes_written / elapsed if elapsed else 0.0,
+            "hash_bytes":    self.hash_bytes,
+            "hash_rate":     (self.hash_bytes / self.hash_seconds
+                              if self.hash_seconds else 0.0),
+            "current":       cur.path if cur else None,
+            "current_done":  self.current_done,
+            "current_size":  cur.size if cur else 0,
+            "finished":      self.finished,
+        }
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot_locked()
+
+
+class ProgressModel(InstallStats):
+    """
+    InstallStats plus an EWMA throughput and ETA, published through
+    *on_update(snapshot)* no more than *max_hz* times a second.  The final
+    state (finish()) is always published.  Non-GUI callers can simply call
+    snapshot() whenever they like.
+    """
+    def __init__(self, on_update=None, max_hz=MAX_HZ, tau=EWMA_TAU):
+        super().__init__()
+        self.on_update = on_update
+        self.min_interval = 1.0 / max_hz if max_hz else 0.0
+        self.tau = tau
+        self.rate = 0.0                 # smoothed bytes/s
+        self._last_pub = None           # monotonic time of the last publish
+        self._last_sample = None        # (time, bytes_done) behind self.rate
+        self._seeded = False
+
+    def seed_rate(self, bytes_per_sec):
+        """
+        Start the average from a known bandwidth instead of from zero; the
+        ETA is then shown from the start rather than after ETA_WARMUP.
+        """
+        with self._lock:
+            self.rate = float(bytes_per_sec)
+            self._seeded = self.rate > 0
+
+    def _sample_locked(self, now):
+        if self._last_sample is None:
+            self._last_sample = (now, self.bytes_done)
+            return
+        t0, b0 = self._last_sample
+        dt = now - t0
+        if dt <= 0:
+            return
+        inst = (self.bytes_done - b0) / dt
+        if self.rate:
+            alpha = 1.0 - math.exp(-dt / self.tau)
+            self.rate += alpha * (inst - self.rate)
+        else:
+            self.rate = inst
+        self._last_sample = (now, self.bytes_done)
+
+    def _snapshot_locked(self):
+        snap = super()._snapshot_locked()
+        remaining = self.bytes_total - self.bytes_done
+        if self.finished or remaining <= 0:
+            eta = 0.0
+        elif self.rate > 0 and (self._seeded or snap["elapsed"] >= ETA_WARMUP):
+            eta = remaining / self.rate
+        else:
+            eta = None
+        snap["rate"] = self.rate
+        snap["eta"] = eta
+        return snap
+
+    def _changed(self):
+        now = time.monotonic()
+        with self._lock:
+            due = (self.finished or self._last_pub is None
+                   or now - self._last_pub >= self.min_interval)
+            if not due:
+                return
+            self._last_pub = now
+            self._sample_locked(now)
+            snap = self._snapshot_locked()
+        if self.on_update:
+            self.on_update(snap)
+
+
+def format_eta(eta):
+    """'Time Remaining 3 minutes 12 seconds' text for a snapshot's eta."""
+    if eta is None:
+        return "Time Remaining (estimating…)"
+    eta = int(math.ceil(eta))
+    return f"Time Remaining {eta // 60} minutes {eta % 60} seconds"
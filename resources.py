@@ -0,0 +1,16 @@
+"""
+resources.py – locate files shipped with the installer
+Python 3.9
+
+Kept apart from the engine so a front end can find its icons and logo
+without importing the copy machinery.
+"""
+
+import os
+import sys
+
+
+def resource_path(rel_path):
+    """Return absolute path to resource, works for PyInstaller."""
+    base = getattr(sys, '_MEIPASS', os.path.abspath(os.path.dirname(__file__)))
+    return os.path.join(base, rel_path)
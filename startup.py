@@ -0,0 +1,61 @@
+"""
+startup.py – launch-latency marks for the Setup wizard
+Python 3.9
+
+Import this first thing in a front end; every mark() is seconds since
+that import.  The wizard records:
+
+    imports       its module imports are done
+    tk_init       the Tk root exists
+    first_paint   the first page got its first Expose
+
+When STEAM_SETUP_STARTUP_LOG names a file the marks are appended to it as
+one JSON line per launch ("-" means stderr), so launch latency on a slow
+VM can be tracked over time.  Other listeners can be added to on_report.
+"""
+
+import os
+import sys
+import time
+
+LOG_ENV = "STEAM_SETUP_STARTUP_LOG"
+
+
+class StartupTimer:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.marks = {}
+        self.on_report = [_log_to_env]
+        self.reported = False
+
+    def mark(self, name):
+        self.marks.setdefault(name, time.perf_counter() - self.t0)
+
+    def report(self):
+        """Pass the marks to every listener, once."""
+        if self.reported:
+            return
+        self.reported = True
+        marks = dict(self.marks)
+        for listener in self.on_report:
+            listener(marks)
+
+
+def _log_to_env(marks):
+    dest = os.environ.get(LOG_ENV)
+    if not dest:
+        return
+    import json                          # only paid for when logging
+    line = json.dumps({"time": time.time(), "pid": os.getpid(),
+                       "marks": {k: round(v, 6) for k, v in marks.items()}})
+    if dest == "-":
+        print(line, file=sys.stderr)
+        return
+    try:
+        with open(dest, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError:
+        pass                             # timing must never break a launch
+
+
+STARTUP = StartupTimer()
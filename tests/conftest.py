@@ -0,0 +1,47 @@
+"""
+conftest.py – shared set-up for the installer's tests
+Python 3.9 / pytest
+
+The installer is a set of flat top-level modules; put the repository
+root on sys.path so the tests import them the way the front ends do.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _read_tree(root):
+    """{relative path: content} of every file below *root*."""
+    out = {}
+    for dirpath, _dirs, names in os.walk(root):
+        for name in names:
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as f:
+                out[os.path.relpath(path, root).replace(os.sep, "/")] = f.read()
+    return out
+
+
+@pytest.fixture
+def read_tree():
+    return _read_tree
+
+
+@pytest.fixture
+def src_tree(tmp_path):
+    """
+    A small release: nested folders, an empty file, two identical files
+    and one file big enough to span several 64 KiB blocks.
+    """
+    src = tmp_path / "src"
+    (src / "bin").mkdir(parents=True)
+    (src / "data" / "deep").mkdir(parents=True)
+    (src / "steam.exe").write_bytes(os.urandom(200_000) + b"x" * 200_000)
+    (src / "bin" / "tool.dll").write_bytes(b"tool" * 20_000)
+    (src / "data" / "empty.txt").write_bytes(b"")
+    (src / "data" / "deep" / "a.bin").write_bytes(b"same" * 5_000)
+    (src / "data" / "deep" / "b.bin").write_bytes(b"same" * 5_000)
+    return str(src)
@@ -0,0 +1,38 @@
+"""
+test_calibrate.py – the disk probe keeps to its time budget
+Python 3.9 / pytest
+"""
+
+import os
+import time
+
+import pytest
+
+import calibrate
+
+
+@pytest.fixture
+def slow_disk(monkeypatch):
+    """fsync takes as long as writing the file at 4 MB/s would."""
+    real = os.fsync
+
+    def fsync(fd):
+        time.sleep(os.fstat(fd).st_size / 4e6)
+        real(fd)
+    monkeypatch.setattr(os, "fsync", fsync)
+
+
+def test_probe_settles_on_something(tmp_path):
+    cal = calibrate.probe(str(tmp_path), budget=0.5)
+    assert cal.buffer_size in calibrate.BUFFER_SIZES
+    assert cal.workers in calibrate.WORKER_COUNTS
+    assert cal.write_rate > 0
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("budget", [0.3, 1.0])
+def test_slow_disk_stays_within_budget(tmp_path, slow_disk, budget):
+    t = time.monotonic()
+    cal = calibrate.probe(str(tmp_path), budget=budget)
+    assert time.monotonic() - t < budget * 1.5
+    assert 1e6 < cal.write_rate < 8e6                  # still roughly measured
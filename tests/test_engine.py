@@ -0,0 +1,128 @@
+"""
+test_engine.py – staged installs: commit, cancel and failure rollback
+Python 3.9 / pytest
+"""
+
+import os
+
+import pytest
+
+from install_engine import (STAGE_NAME, InstallCancelled, VerificationError,
+                            make_engine)
+from journal import JOURNAL_NAME
+from payload import PayloadReader, build_payload
+from progress import InstallStats
+
+
+def _cancel_after(nbytes):
+    """(stats, attach) – stats that cancel attach()'s engine after *nbytes*."""
+    box = {}
+
+    def changed():
+        if stats.bytes_done >= nbytes and "engine" in box:
+            box["engine"].cancel()
+    stats = InstallStats(on_change=changed)
+    return stats, lambda engine: box.setdefault("engine", engine)
+
+
+def _engine(target, payload, stats=None, **kw):
+    kw.setdefault("tune", False)
+    kw.setdefault("workers", 1)
+    return make_engine(target, stats=stats, payload=payload, **kw)
+
+
+def _run(engine):
+    try:
+        return engine.run()
+    finally:
+        close = getattr(engine.source, "close", None)
+        if close:
+            close()
+
+
+def test_install_commits_everything(tmp_path, src_tree, read_tree):
+    target = str(tmp_path / "target")
+    _run(_engine(target, src_tree))
+    assert read_tree(target) == read_tree(src_tree)
+    assert sorted(os.listdir(target)) == ["bin", "data", "steam.exe"]
+
+
+def test_cancel_removes_a_new_target(tmp_path, src_tree):
+    target = str(tmp_path / "target")
+    stats, attach = _cancel_after(1)
+    engine = attach(_engine(target, src_tree, stats))
+    with pytest.raises(InstallCancelled):
+        _run(engine)
+    assert not os.path.exists(target)
+
+
+def test_cancel_leaves_an_existing_install_as_it_was(tmp_path, src_tree,
+                                                     read_tree):
+    target = tmp_path / "target"
+    target.mkdir()
+    (target / "steam.exe").write_bytes(b"old release")
+    (target / "config.vdf").write_bytes(b"user settings")
+    before = read_tree(str(target))
+
+    stats, attach = _cancel_after(1)
+    engine = attach(_engine(str(target), src_tree, stats))
+    with pytest.raises(InstallCancelled):
+        _run(engine)
+    assert read_tree(str(target)) == before
+    assert not os.path.exists(target / STAGE_NAME)
+    assert not os.path.exists(target / JOURNAL_NAME)
+
+
+def test_cancel_during_an_upgrade_keeps_the_old_files(tmp_path, src_tree,
+                                                      read_tree):
+    target = str(tmp_path / "target")
+    _run(_engine(target, src_tree))
+    with open(os.path.join(target, "steam.exe"), "r+b") as f:
+        f.write(b"patched locally")
+    for name in ("steam.exe", os.path.join("bin", "tool.dll")):
+        os.utime(os.path.join(target, name), (1e9, 1e9))   # force re-hashing
+    before = read_tree(target)
+
+    stats, attach = _cancel_after(1)
+    engine = attach(_engine(target, src_tree, stats, upgrade=True))
+    with pytest.raises(InstallCancelled):
+        _run(engine)
+    assert read_tree(target) == before
+
+
+def _corrupt_container(tmp_path, src_tree):
+    """Stored container whose steam.exe data no longer matches its hash."""
+    path = str(tmp_path / "bad.stp")
+    build_payload(src_tree, path)
+    with PayloadReader(path) as r:
+        exe = next(e for e in r.entries if e.path == "steam.exe")
+        at = r.base + exe.offset + exe.length // 2
+    with open(path, "r+b") as f:
+        f.seek(at)
+        f.write(b"\0" * 16)
+    return path
+
+
+def test_failure_without_resume_rolls_back(tmp_path, src_tree):
+    target = str(tmp_path / "target")
+    engine = _engine(target, _corrupt_container(tmp_path, src_tree),
+                     resume=False)
+    with pytest.raises(VerificationError) as info:
+        _run(engine)
+    assert [path for path, _exp, _act in info.value.failures] == ["steam.exe"]
+    assert engine.kept is None
+    assert not os.path.exists(target)
+
+
+def test_failure_with_resume_keeps_the_stage(tmp_path, src_tree):
+    target = str(tmp_path / "target")
+    engine = _engine(target, _corrupt_container(tmp_path, src_tree),
+                     resume=True)
+    with pytest.raises(VerificationError):
+        _run(engine)
+    assert engine.kept == os.path.join(target, STAGE_NAME)
+    assert os.path.isdir(engine.kept)
+    assert os.path.exists(os.path.join(target, JOURNAL_NAME))
+    # nothing was committed, and the bad file wasn't kept to be trusted later
+    assert sorted(os.listdir(target)) == sorted([STAGE_NAME, JOURNAL_NAME])
+    assert not os.path.exists(os.path.join(engine.kept, "steam.exe"))
@@ -0,0 +1,100 @@
+"""
+test_journal.py – the install journal, and resuming an install that was killed
+Python 3.9 / pytest
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from install_engine import STAGE_NAME, make_engine
+from journal import JOURNAL_NAME, InstallJournal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_records_survive_a_reopen(tmp_path):
+    j = InstallJournal(str(tmp_path), "id-1", commit_seconds=0)
+    dst = tmp_path / "big.bin"
+    dst.write_bytes(b"x" * 1000)
+    j.file_done("a.txt")
+    j.commit("big.bin", str(dst), 600)
+    j.close()
+
+    again = InstallJournal(str(tmp_path), "id-1")
+    assert again.resumed
+    assert again.done == {"a.txt"}
+    assert again.partial == {"big.bin": 600}
+    again.close(remove=True)
+    assert not os.path.exists(tmp_path / JOURNAL_NAME)
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    j = InstallJournal(str(tmp_path), "id-1", commit_seconds=0)
+    j.file_done("a.txt")
+    j.close()
+    with open(tmp_path / JOURNAL_NAME, "a", encoding="utf-8") as f:
+        f.write('{"done": "b.t')                 # killed mid-write
+    again = InstallJournal(str(tmp_path), "id-1")
+    assert again.done == {"a.txt"}
+    again.close()
+
+
+def test_journal_of_another_payload_is_ignored(tmp_path):
+    j = InstallJournal(str(tmp_path), "id-1", commit_seconds=0)
+    j.file_done("a.txt")
+    j.close()
+    other = InstallJournal(str(tmp_path), "id-2")
+    assert not other.resumed and not other.done
+    other.close()
+
+
+# The child installs with a journal that commits every 64 KiB and SIGKILLs
+# itself half-way through the big file – no cleanup code gets to run.
+_CHILD = textwrap.dedent("""
+    import os, signal, sys
+    sys.path.insert(0, {root!r})
+    import journal
+    journal.InstallJournal.__init__.__defaults__ = (64 * 1024, 0.0)
+    from install_engine import make_engine
+    from progress import InstallStats
+
+    class KillHalfway(InstallStats):
+        def advance(self, n, entry=None, written=None):
+            super().advance(n, entry, written)
+            if self.bytes_done > {kill_at}:
+                os.kill(os.getpid(), signal.SIGKILL)
+
+    make_engine({target!r}, stats=KillHalfway(), payload={src!r},
+                workers=1, tune=False).run()
+""")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs SIGKILL")
+def test_resume_after_kill(tmp_path, src_tree, read_tree):
+    big = os.path.join(src_tree, "gcf", "big.gcf")
+    os.makedirs(os.path.dirname(big))
+    with open(big, "wb") as f:
+        f.write(os.urandom(4 * 1024 * 1024))
+    target = str(tmp_path / "target")
+    total = sum(len(d) for d in read_tree(src_tree).values())
+
+    child = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(root=ROOT, target=target,
+                                             src=src_tree, kill_at=total // 2)],
+        capture_output=True)
+    assert child.returncode == -signal.SIGKILL, child.stderr.decode()
+    # killed mid-copy: nothing committed yet, the journal knows how far it got
+    assert os.path.isdir(os.path.join(target, STAGE_NAME))
+    assert not os.path.exists(os.path.join(target, "steam.exe"))
+    with open(os.path.join(target, JOURNAL_NAME), encoding="utf-8") as f:
+        assert '"partial"' in f.read()
+
+    engine = make_engine(target, payload=src_tree, workers=1, tune=False)
+    snap = engine.run()
+    assert read_tree(target) == read_tree(src_tree)     # journal and stage gone
+    assert 0 < snap["bytes_written"] < total * 0.75     # the rest wasn't redone
@@ -0,0 +1,132 @@
+"""
+test_ordered.py – _ordered(): order, windows and the shared decode slots
+Python 3.9 / pytest
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from payload import PayloadReader, PayloadWriter, _ordered
+
+
+def _free(sem):
+    """How many slots of *sem* can be taken right now."""
+    n = 0
+    while sem.acquire(blocking=False):
+        n += 1
+    for _ in range(n):
+        sem.release()
+    return n
+
+
+class _Counter:
+    """fn for the pool that tracks how many results are out at once."""
+    def __init__(self):
+        self.out = self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, x):
+        with self.lock:
+            self.out += 1
+            self.peak = max(self.peak, self.out)
+        return x
+
+    def used(self):
+        with self.lock:
+            self.out -= 1
+
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(4) as p:
+        yield p
+
+
+def test_results_in_order_within_the_window(pool):
+    fn = _Counter()
+    got = []
+    for x in _ordered(pool, fn, ((i,) for i in range(50)), window=3):
+        got.append(x)
+        fn.used()
+    assert got == list(range(50))
+    assert fn.peak <= 3
+
+
+def test_shared_slots_bound_several_iterators(pool):
+    slots = threading.BoundedSemaphore(4)
+    fn = _Counter()
+    got = {}
+
+    def lane(k):                          # one copy lane per thread
+        got[k] = []
+        for x in _ordered(pool, fn, ((i,) for i in range(k, k + 30)), 4, slots):
+            got[k].append(x)
+            fn.used()
+    lanes = [threading.Thread(target=lane, args=(k,)) for k in (0, 100, 200)]
+    for t in lanes:
+        t.start()
+    for t in lanes:
+        t.join(30)
+    assert not any(t.is_alive() for t in lanes)
+    assert got == {k: list(range(k, k + 30)) for k in (0, 100, 200)}
+    assert fn.peak <= 4
+    assert _free(slots) == 4
+
+
+def test_closing_early_gives_the_slots_back(pool):
+    slots = threading.BoundedSemaphore(4)
+    it = _ordered(pool, lambda x: x, ((i,) for i in range(20)), 4, slots)
+    assert next(it) == 0
+    assert _free(slots) < 4
+    it.close()
+    assert _free(slots) == 4
+
+
+def test_a_failing_job_gives_the_slots_back(pool):
+    slots = threading.BoundedSemaphore(4)
+
+    def fn(x):
+        if x == 5:
+            raise ValueError("bad block")
+        return x
+    it = _ordered(pool, fn, ((i,) for i in range(20)), 4, slots)
+    with pytest.raises(ValueError):
+        list(it)
+    assert _free(slots) == 4
+
+
+def test_reader_slots_are_shared_by_every_lane(tmp_path):
+    path = str(tmp_path / "p.stp")
+    data = {f"f{i}.bin": bytes([i]) * 300_000 for i in range(4)}
+    for name, content in data.items():
+        (tmp_path / name).write_bytes(content)
+    with PayloadWriter(path, block_size=32 * 1024) as w:
+        for name in data:
+            w.add_file(str(tmp_path / name), name, "zlib-blocks")
+
+    with PayloadReader(path, processes=2) as r:
+        errors = []
+
+        def lane(entry, stop_after):
+            out = bytearray()
+            chunks = r.iter_chunks(entry)
+            try:
+                for n, chunk in enumerate(chunks):
+                    out += chunk
+                    if n == stop_after:
+                        return                    # abandoned, like a failed lane
+            finally:
+                chunks.close()
+            if bytes(out) != data[entry.path]:
+                errors.append(entry.path)
+        lanes = [threading.Thread(target=lane, args=(e, 2 if i == 0 else -1))
+                 for i, e in enumerate(r.entries)]
+        for t in lanes:
+            t.start()
+        for t in lanes:
+            t.join(30)
+        assert not any(t.is_alive() for t in lanes)   # no lane starved
+        assert errors == []
+        assert _free(r._slots) == 2 * r.processes
@@ -0,0 +1,199 @@
+"""
+test_payload.py – container round trips, damage detection and blob sharing
+Python 3.9 / pytest
+"""
+
+import importlib.util
+import json
+import os
+
+import pytest
+
+from install_engine import make_engine
+from manifest import Manifest
+from payload import (_TRAILER, MAGIC, PayloadError, PayloadReader,
+                     PayloadWriter)
+
+BLOCK = 64 * 1024                 # small blocks, so files span several
+
+MODES = ["none", "zlib", "lzma", "zlib-blocks", "lzma-blocks",
+         pytest.param("zstd-blocks", marks=pytest.mark.skipif(
+             not importlib.util.find_spec("zstandard"),
+             reason="needs the zstandard package"))]
+
+
+def _pack(src, out, compression="none", append=False):
+    with PayloadWriter(out, append=append, block_size=BLOCK) as w:
+        for e in Manifest.build(src).entries:
+            w.add_file(e.target(src), e.path, compression, digest=e.hash)
+    return out
+
+
+def _content(reader, entry):
+    return b"".join(bytes(c) for c in reader.iter_chunks(entry))
+
+
+def _data_end(path):
+    """Where the entry data ends (the index offset in the trailer)."""
+    with open(path, "rb") as f:
+        f.seek(-_TRAILER.size, os.SEEK_END)
+        return _TRAILER.unpack(f.read())[1]
+
+
+def _rewrite_index(path, edit):
+    """Replace the container's index with edit(index dict)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, off, length = _TRAILER.unpack_from(data, len(data) - _TRAILER.size)
+    index = json.loads(data[off:off + length])
+    edit(index)
+    raw = json.dumps(index).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data[:off] + raw + _TRAILER.pack(magic, off, len(raw)))
+
+
+# ────────────────────────────────────────────────────────────────
+# Round trips
+# ────────────────────────────────────────────────────────────────
+@pytest.mark.parametrize("mode", MODES)
+def test_round_trip(tmp_path, src_tree, read_tree, mode):
+    files = read_tree(src_tree)
+    with PayloadReader(_pack(src_tree, str(tmp_path / "p.stp"), mode),
+                       processes=1) as r:
+        assert {e.path for e in r.entries} == set(files)
+        for e in r.entries:
+            assert e.compression == mode
+            assert _content(r, e) == files[e.path]
+        exe = next(e for e in r.entries if e.path == "steam.exe")
+        data = files["steam.exe"]
+        assert r.read_range(exe, 150_000, 100_000) == data[150_000:250_000]
+        assert r.read_range(exe, 399_990, 100) == data[399_990:]   # short at EOF
+
+
+def test_blocks_decoded_by_a_process_pool(tmp_path, src_tree, read_tree):
+    files = read_tree(src_tree)
+    with PayloadReader(_pack(src_tree, str(tmp_path / "p.stp"), "zlib-blocks"),
+                       processes=2) as r:
+        exe = next(e for e in r.entries if e.path == "steam.exe")
+        assert len(exe.blocks) > 2
+        assert _content(r, exe) == files["steam.exe"]
+        # resuming part-way only decodes from the block holding the offset
+        assert b"".join(r.iter_chunks(exe, start=BLOCK + 10)) == \
+            files["steam.exe"][BLOCK + 10:]
+
+
+@pytest.mark.parametrize("mode", ["none", "lzma", "zlib-blocks"])
+def test_install_from_container(tmp_path, src_tree, read_tree, mode):
+    payload = _pack(src_tree, str(tmp_path / "p.stp"), mode)
+    target = str(tmp_path / "target")
+    engine = make_engine(target, payload=payload, tune=False)
+    try:
+        engine.run()
+    finally:
+        engine.source.close()
+    assert read_tree(target) == read_tree(src_tree)
+
+
+def test_container_appended_to_an_executable(tmp_path, src_tree, read_tree):
+    exe = tmp_path / "setup.exe"
+    stub = b"MZ" + os.urandom(10_000)
+    exe.write_bytes(stub)
+    _pack(src_tree, str(exe), "zlib", append=True)
+    with open(exe, "rb") as f:
+        assert f.read(len(stub)) == stub          # the program is untouched
+    with PayloadReader(str(exe)) as r:
+        assert r.base == len(stub)
+        files = read_tree(src_tree)
+        for e in r.entries:
+            assert _content(r, e) == files[e.path]
+
+
+# ────────────────────────────────────────────────────────────────
+# Damage
+# ────────────────────────────────────────────────────────────────
+@pytest.mark.parametrize("data", [b"", b"MZ" * 5000, MAGIC + b"\0" * 16])
+def test_not_a_container(tmp_path, data):
+    path = tmp_path / "x.stp"
+    path.write_bytes(data)
+    with pytest.raises(PayloadError):
+        PayloadReader(str(path))
+    assert PayloadReader.find(str(path)) is None
+
+
+def test_trailer_pointing_before_the_file(tmp_path, src_tree):
+    path = _pack(src_tree, str(tmp_path / "p.stp"))
+    with open(path, "r+b") as f:
+        f.seek(-_TRAILER.size, os.SEEK_END)
+        f.write(_TRAILER.pack(MAGIC, 1 << 40, 10))
+    with pytest.raises(PayloadError, match="trailer"):
+        PayloadReader(path)
+
+
+@pytest.mark.parametrize("edit", [
+    lambda ix: ix.update(version=2),
+    lambda ix: ix.pop("entries"),
+    lambda ix: ix["entries"][0].pop("hash"),
+    lambda ix: ix["entries"][0].update(size="lots"),
+    lambda ix: ix["entries"][0].update(path="../../evil.exe"),
+    lambda ix: ix["entries"][0].update(compression="rar"),
+    lambda ix: ix["entries"][0].update(offset=1 << 40),
+], ids=["version", "no-entries", "no-hash", "bad-size", "escaping-path",
+        "unknown-codec", "out-of-bounds"])
+def test_damaged_index(tmp_path, src_tree, edit):
+    path = _pack(src_tree, str(tmp_path / "p.stp"))
+    _rewrite_index(path, edit)
+    with pytest.raises(PayloadError):
+        PayloadReader(path)
+
+
+def test_index_that_is_not_json(tmp_path, src_tree):
+    path = _pack(src_tree, str(tmp_path / "p.stp"))
+    with open(path, "r+b") as f:
+        f.seek(_data_end(path))
+        f.write(b"#")
+    with pytest.raises(PayloadError, match="index"):
+        PayloadReader(path)
+
+
+@pytest.mark.parametrize("mode", ["zlib", "lzma", "zlib-blocks", "lzma-blocks"])
+def test_damaged_entry_names_the_file(tmp_path, src_tree, mode):
+    path = _pack(src_tree, str(tmp_path / "p.stp"), mode)
+    with PayloadReader(path) as r:
+        exe = next(e for e in r.entries if e.path == "steam.exe")
+        start, length = r.base + exe.offset, exe.length
+    with open(path, "r+b") as f:
+        f.seek(start + length // 2)
+        f.write(b"\xff" * 64)
+    with PayloadReader(path, processes=1) as r:
+        exe = next(e for e in r.entries if e.path == "steam.exe")
+        with pytest.raises(PayloadError, match="steam.exe"):
+            _content(r, exe)
+
+
+def test_close_with_a_chunk_still_alive(tmp_path, src_tree):
+    r = PayloadReader(_pack(src_tree, str(tmp_path / "p.stp")))
+    exe = next(e for e in r.entries if e.path == "steam.exe")
+    chunks = r.iter_chunks(exe, step=1024)
+    kept = next(chunks)                           # e.g. held by a traceback
+    r.close()                                     # must not raise BufferError
+    assert len(kept) == 1024
+
+
+# ────────────────────────────────────────────────────────────────
+# Blob sharing
+# ────────────────────────────────────────────────────────────────
+def test_identical_files_are_stored_once(tmp_path, src_tree, read_tree):
+    shared = _pack(src_tree, str(tmp_path / "p.stp"), "zlib")
+    with PayloadReader(shared) as r:
+        by_path = {e.path: e for e in r.entries}
+        a, b = by_path["data/deep/a.bin"], by_path["data/deep/b.bin"]
+        assert (a.offset, a.length) == (b.offset, b.length)
+        assert _content(r, b) == read_tree(src_tree)["data/deep/b.bin"]
+        # an empty file shares nothing with whatever comes next
+        empty = by_path["data/empty.txt"]
+        assert _content(r, empty) == b""
+
+    os.remove(os.path.join(src_tree, "data", "deep", "b.bin"))
+    single = _pack(src_tree, str(tmp_path / "single.stp"), "zlib")
+    # the duplicate added an index entry, but no data
+    assert _data_end(shared) == _data_end(single)
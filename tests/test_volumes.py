@@ -0,0 +1,95 @@
+"""
+test_volumes.py – discover(): parallel probes, timeout, session cache
+Python 3.9 / pytest
+"""
+
+import queue
+import time
+
+import pytest
+
+import volumes
+from volumes import FakeVolumes, discover
+
+TIMEOUT = 0.3
+
+
+@pytest.fixture(autouse=True)
+def fresh_session():
+    volumes._SESSION.clear()
+    yield
+    volumes._SESSION.clear()
+
+
+def _run(provider, **kw):
+    """Keys delivered before the end marker, and seconds until that marker."""
+    found = queue.Queue()
+    t = time.monotonic()
+    discover(provider, found.put, timeout=kw.pop("timeout", TIMEOUT), **kw)
+    keys = []
+    while True:
+        vol = found.get(timeout=5)
+        if vol is None:
+            return keys, time.monotonic() - t
+        keys.append(vol.key)
+
+
+def test_all_volumes_delivered():
+    fake = FakeVolumes([("C:", "C:\\", "System", 0.0),
+                        ("D:", "D:\\", "Data", 0.05)])
+    keys, _ = _run(fake)
+    assert sorted(keys) == ["C:", "D:"]
+
+
+def test_slow_volume_times_out_without_blocking_the_rest():
+    fake = FakeVolumes([("C:", "C:\\", "System", 0.0),
+                        ("S:", "S:\\", "Share", 2.0),
+                        ("D:", "D:\\", "Data", 0.0)])
+    keys, took = _run(fake)
+    assert sorted(keys) == ["C:", "D:"]          # S: left out, not waited for
+    assert took < 1.0
+    # until it answers, the timed-out volume counts as absent
+    assert volumes._SESSION[("fake", "S:")] is None
+
+
+def test_failing_volume_is_skipped():
+    fake = FakeVolumes([("C:", "C:\\", "System", 0.0),
+                        ("E:", "E:\\", None, 0.0)])
+    keys, _ = _run(fake)
+    assert keys == ["C:"]
+    assert volumes._SESSION[("fake", "E:")] is None
+
+
+def test_second_discovery_comes_from_the_cache():
+    fake = FakeVolumes([("C:", "C:\\", "System", 0.0),
+                        ("E:", "E:\\", None, 0.0)])
+    _run(fake)
+    fake.probed.clear()
+    keys, _ = _run(fake)
+    assert keys == ["C:"]
+    assert fake.probed == []                      # nothing probed again
+
+    keys, _ = _run(fake, use_cache=False)
+    assert sorted(fake.probed) == ["C:", "E:"]
+
+
+def test_late_answer_updates_the_cache_only():
+    fake = FakeVolumes([("C:", "C:\\", "System", 0.0),
+                        ("N:", "N:\\", "Share", 0.6)])
+    found = queue.Queue()
+    discover(fake, found.put, timeout=0.1)
+    got = []
+    while True:
+        vol = found.get(timeout=5)
+        got.append(vol and vol.key)
+        if vol is None:
+            break
+    time.sleep(0.8)                               # N: answers after the end
+    assert found.empty()                          # …and isn't delivered late
+    assert got == ["C:", None]
+    assert volumes._SESSION[("fake", "N:")].label == "Share"
+
+    fake.probed.clear()
+    keys, _ = _run(fake)
+    assert sorted(keys) == ["C:", "N:"]
+    assert fake.probed == []
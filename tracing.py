@@ -0,0 +1,241 @@
+"""
+tracing.py – opt-in phase tracing for slow installs in the field
+Python 3.9
+
+Off unless STEAM_SETUP_TRACE names an output file or a front end is
+started with --trace PATH.  While off, span() hands back one shared
+no-op object, so the hooks left in the code cost next to nothing.
+
+When on, spans are kept in memory and written at exit to PATH as Chrome
+trace-event JSON (load it in chrome://tracing or ui.perfetto.dev), and
+to PATH.txt as a plain per-phase summary table – both can go straight
+onto a support ticket.  Recorded:
+
+    pyinstaller.extract   onefile bootloader unpacking (its start → ours)
+    python.init           process start until startup.py was imported
+    imports / tk_init / first_paint    startup.py marks, as instants
+    page <name>           building a wizard page
+    folder_dialog         _FolderDialog set-up; drive_scan, tree_fill
+    install.*             engine phases, and one "file" span per file
+    tk.latency            how late Tk ran a timer, sampled by watch_tk()
+"""
+
+import atexit
+import os
+import sys
+import threading
+import time
+
+from startup import STARTUP
+
+TRACE_ENV    = "STEAM_SETUP_TRACE"
+TK_SAMPLE_MS = 50                    # watch_tk() timer interval
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer, self.name, self.cat, self.args = tracer, name, cat, args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.add(self.name, self.cat, self.start, time.perf_counter(),
+                        **self.args)
+        return False
+
+
+class Tracer:
+    """Times are perf_counter() seconds; the trace starts at STARTUP.t0."""
+    def __init__(self):
+        self.path = None
+        self.events = []
+        self.latency = []                # Tk timer lateness samples, seconds
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def enable(self, path):
+        """Start recording; everything is written to *path* at exit."""
+        if self.enabled or not path:
+            return
+        self.path = path
+        self._process_spans()
+        STARTUP.on_report.append(self._startup_marks)
+        atexit.register(self.write)
+
+    def enable_from_argv(self, argv):
+        """Honour ``--trace PATH`` / ``--trace=PATH`` in *argv*."""
+        for i, arg in enumerate(argv):
+            if arg == "--trace" and i + 1 < len(argv):
+                self.enable(argv[i + 1])
+            elif arg.startswith("--trace="):
+                self.enable(arg[len("--trace="):])
+
+    # ── recording ──────────────────────────────────────────────────
+    def _event(self, ev):
+        t = threading.current_thread()
+        ev["pid"], ev["tid"] = os.getpid(), t.ident
+        with self._lock:
+            self._threads.setdefault(t.ident, t.name)
+            self.events.append(ev)
+
+    def _us(self, t):
+        return round((t - STARTUP.t0) * 1e6, 1)
+
+    def add(self, name, cat, start, end, **args):
+        """A finished span from *start* to *end*."""
+        if not self.enabled:
+            return
+        self._event({"name": name, "cat": cat, "ph": "X", "ts": self._us(start),
+                     "dur": round((end - start) * 1e6, 1), "args": args})
+
+    def span(self, name, cat="app", **args):
+        """``with TRACER.span("name"):`` – times the block."""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name, cat, args)
+
+    def instant(self, name, cat="app", at=None, **args):
+        if not self.enabled:
+            return
+        self._event({"name": name, "cat": cat, "ph": "i", "s": "p", "args": args,
+                     "ts": self._us(time.perf_counter() if at is None else at)})
+
+    def counter(self, name, **values):
+        if not self.enabled:
+            return
+        self._event({"name": name, "ph": "C", "ts": self._us(time.perf_counter()),
+                     "args": values})
+
+    def _startup_marks(self, marks):
+        for name, t in marks.items():
+            self.instant(name, "startup", at=STARTUP.t0 + t)
+
+    def _process_spans(self):
+        # perf_counter has no fixed epoch – place wall-clock times against now
+        me = _process_start(os.getpid())
+        if me is None:
+            return
+        offset = time.perf_counter() - time.time()
+        if getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS"):
+            parent = _process_start(os.getppid())
+            if parent is not None and parent <= me:
+                self.add("pyinstaller.extract", "startup",
+                         parent + offset, me + offset)
+        if me + offset < STARTUP.t0:
+            self.add("python.init", "startup", me + offset, STARTUP.t0)
+
+    # ── Tk ─────────────────────────────────────────────────────────
+    def watch_tk(self, widget, interval_ms=TK_SAMPLE_MS):
+        """Sample how late *widget*'s event loop runs a timer, until it dies."""
+        if not self.enabled:
+            return
+        import tkinter as tk
+
+        def tick(due):
+            late = max(0.0, time.perf_counter() - due)
+            self.latency.append(late)
+            self.counter("tk.latency", ms=round(late * 1e3, 3))
+            try:
+                widget.after(interval_ms, tick,
+                             time.perf_counter() + interval_ms / 1e3)
+            except tk.TclError:
+                pass                     # window gone
+        widget.after(interval_ms, tick, time.perf_counter() + interval_ms / 1e3)
+
+    # ── output ─────────────────────────────────────────────────────
+    def chrome_trace(self):
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self._threads)
+        meta = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                 "args": {"name": name}} for tid, name in threads.items()]
+        return {"traceEvents": meta + events, "displayTimeUnit": "ms"}
+
+    def summary(self):
+        """Plain table: count, total, mean and max per phase, in ms."""
+        rows = {}
+        with self._lock:
+            spans = [e for e in self.events if e["ph"] == "X"]
+        for e in spans:
+            key = "file copy" if e["cat"] == "file" else e["name"]
+            n, total, worst = rows.get(key, (0, 0.0, 0.0))
+            rows[key] = (n + 1, total + e["dur"], max(worst, e["dur"]))
+        width = max([len(k) for k in rows] + [5])
+        lines = [f"{'phase':<{width}} {'count':>7} {'total ms':>11} "
+                 f"{'mean ms':>10} {'max ms':>10}"]
+        for key, (n, total, worst) in sorted(rows.items(),
+                                             key=lambda kv: -kv[1][1]):
+            lines.append(f"{key:<{width}} {n:7d} {total / 1e3:11.2f} "
+                         f"{total / n / 1e3:10.3f} {worst / 1e3:10.3f}")
+        if self.latency:
+            lat = sorted(self.latency)
+            pick = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))] * 1e3
+            lines.append(f"\nTk event latency over {len(lat)} samples: "
+                         f"p50 {pick(0.5):.1f} ms, p95 {pick(0.95):.1f} ms, "
+                         f"max {lat[-1] * 1e3:.1f} ms")
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        """Write PATH and PATH.txt; a failure here must never break an install."""
+        if not self.enabled:
+            return
+        import json
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self.chrome_trace(), f, separators=(",", ":"))
+            with open(self.path + ".txt", "w", encoding="utf-8") as f:
+                f.write(self.summary())
+        except OSError:
+            pass
+
+
+def _process_start(pid):
+    """Wall-clock creation time of process *pid*, or None if unknown."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            k32 = ctypes.windll.kernel32
+            h = k32.OpenProcess(0x1000, False, pid)   # QUERY_LIMITED_INFORMATION
+            if not h:
+                return None
+            try:
+                times = [wintypes.FILETIME() for _ in range(4)]
+                if not k32.GetProcessTimes(h, *[ctypes.byref(t) for t in times]):
+                    return None
+            finally:
+                k32.CloseHandle(h)
+            ft = times[0].dwHighDateTime << 32 | times[0].dwLowDateTime
+            return (ft - 116444736000000000) / 1e7    # 1601 ➜ 1970, 100 ns units
+        with open(f"/proc/{pid}/stat", "r") as f:
+            # the command name may hold spaces – fields count from its ')'
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+        # age from uptime – /proc/stat's btime is only whole seconds
+        return time.time() - (uptime - ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+TRACER = Tracer()
+TRACER.enable(os.environ.get(TRACE_ENV))
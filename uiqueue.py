@@ -0,0 +1,70 @@
+"""
+uiqueue.py – hand-over from worker threads to the Tk thread
+Python 3.9
+
+Workers never touch Tk.  They post into a UiQueue, and the Tk thread
+drains it from one periodic after() poll:
+
+    post(key, value)    state – only the latest value per key survives
+    call(fn, *args)     one-off events (done, error) – kept, in order
+
+so the UI does a fixed amount of work per poll however fast the workers
+produce updates.
+"""
+
+import threading
+import tkinter as tk
+from collections import deque
+
+POLL_MS = 33                 # ≈ 30 Hz
+
+
+class UiQueue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest = {}
+        self._calls = deque()
+        self._widget = None
+        self._after_id = None
+
+    # ── worker side ────────────────────────────────────────────────
+    def post(self, key, value):
+        with self._lock:
+            self._latest[key] = value
+
+    def call(self, fn, *args):
+        with self._lock:
+            self._calls.append((fn, args))
+
+    # ── Tk side ────────────────────────────────────────────────────
+    def drain(self):
+        """({key: latest value}, [(fn, args)]) posted since the last drain."""
+        with self._lock:
+            latest, self._latest = self._latest, {}
+            calls = list(self._calls)
+            self._calls.clear()
+        return latest, calls
+
+    def attach(self, widget, handlers, interval=POLL_MS):
+        """
+        Poll from *widget*'s event loop: every *interval* ms the latest
+        value of each key goes to *handlers[key]*, then queued calls run.
+        """
+        def poll():
+            self._after_id = None
+            latest, calls = self.drain()
+            for key, value in latest.items():
+                handlers[key](value)
+            for fn, args in calls:
+                fn(*args)
+            try:
+                self._after_id = widget.after(interval, poll)
+            except tk.TclError:
+                pass                      # a call closed the window
+        self._widget = widget
+        self._after_id = widget.after(interval, poll)
+
+    def detach(self):
+        if self._after_id is not None:
+            self._widget.after_cancel(self._after_id)
+            self._after_id = None
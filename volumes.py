@@ -0,0 +1,208 @@
+"""
+volumes.py – volume discovery for the folder browser's drive list
+Python 3.9
+
+A provider lists candidate volumes cheaply (no I/O that can hang) and
+probes each one for presence and label.  discover() runs the probes in
+parallel on daemon threads, hands each volume over as soon as its probe
+returns and gives up on a probe after PROBE_TIMEOUT – a disconnected
+network drive can't stall the dialog.  Answers (timeouts included) are
+cached for the session; a probe that finishes late still updates it.
+
+    WindowsVolumes   drive letters, GetVolumeInformationW labels
+    MountVolumes     POSIX mount points from /proc/self/mounts
+    FakeVolumes      scripted volumes with delays/failures, for tests
+"""
+
+import os
+import sys
+import threading
+import time
+
+PROBE_TIMEOUT = 1.5          # seconds one volume may take to answer
+
+# pseudo and virtual file systems that are no use as an install target
+_SKIP_FS = {"proc", "sysfs", "devtmpfs", "devpts", "cgroup", "cgroup2",
+            "securityfs", "pstore", "debugfs", "tracefs", "configfs",
+            "fusectl", "mqueue", "hugetlbfs", "bpf", "autofs", "binfmt_misc",
+            "efivarfs", "rpc_pipefs", "nsfs", "overlay", "squashfs", "ramfs"}
+_NETWORK_FS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "9p", "fuse.sshfs"}
+
+
+class Volume:
+    """*key* is what the drive list shows first ('C:' or '/mnt/data')."""
+    __slots__ = ("key", "root", "label")
+
+    def __init__(self, key, root, label):
+        self.key, self.root, self.label = key, root, label
+
+    def __repr__(self):
+        return f"Volume({self.key!r}, {self.root!r}, {self.label!r})"
+
+
+class VolumeProvider:
+    """Base class: candidates() must be quick, probe() may block."""
+    name = "base"
+
+    def candidates(self):
+        """[(key, root)] in display order."""
+        raise NotImplementedError
+
+    def probe(self, key, root):
+        """A Volume if *root* is usable, else None."""
+        raise NotImplementedError
+
+
+class WindowsVolumes(VolumeProvider):
+    name = "windows"
+
+    def candidates(self):
+        import ctypes
+        mask = ctypes.windll.kernel32.GetLogicalDrives()   # no disk access
+        return [(f"{d}:", f"{d}:\\") for i, d in enumerate("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+                if mask >> i & 1]
+
+    def probe(self, key, root):
+        import ctypes
+        if not os.path.exists(root):                        # empty drive, dead share
+            return None
+        k32 = ctypes.windll.kernel32
+        label = "Network Drive" if k32.GetDriveTypeW(root) == 4 else "Local Disk"
+        buf = ctypes.create_unicode_buffer(261)
+        if k32.GetVolumeInformationW(root, buf, 260, None, None, None, None, 0):
+            label = buf.value or label
+        return Volume(key, root, label)
+
+
+class MountVolumes(VolumeProvider):
+    name = "mounts"
+
+    def __init__(self, mounts="/proc/self/mounts"):
+        self.mounts = mounts
+        self._fs = {}                                       # mount point ➜ fs type
+
+    def candidates(self):
+        found = ["/"]
+        try:
+            with open(self.mounts, "r", encoding="utf-8", errors="replace") as f:
+                lines = f.read().splitlines()
+        except OSError:                                     # no procfs (macOS)
+            lines = []
+            if os.path.isdir("/Volumes"):
+                found += [os.path.join("/Volumes", n)
+                          for n in sorted(os.listdir("/Volumes"))]
+        for line in lines:
+            parts = line.split()
+            if len(parts) < 3:
+                continue
+            dev, mnt, fs = parts[:3]
+            mnt = mnt.replace("\\040", " ")
+            self._fs.setdefault(mnt, fs)
+            if (fs in _SKIP_FS or mnt in found
+                    or mnt.startswith(("/proc", "/sys", "/dev", "/run"))):
+                continue
+            if dev.startswith("/") or fs in _NETWORK_FS or fs == "tmpfs":
+                found.append(mnt)
+        return [(mnt, mnt) for mnt in found]
+
+    def probe(self, key, root):
+        os.statvfs(root)                                    # blocks on a dead mount
+        fs = self._fs.get(root, "")
+        if fs in _NETWORK_FS:
+            label = "Network Drive"
+        elif root == "/":
+            label = "File System"
+        else:
+            label = os.path.basename(root) or root
+        return Volume(key, root, label)
+
+
+class FakeVolumes(VolumeProvider):
+    """*spec*: [(key, root, label, delay_seconds)]; label None = probe fails."""
+    name = "fake"
+
+    def __init__(self, spec):
+        self.spec = list(spec)
+        self.probed = []                  # keys in the order probe() was called
+
+    def candidates(self):
+        return [(key, root) for key, root, _label, _delay in self.spec]
+
+    def probe(self, key, root):
+        self.probed.append(key)
+        for k, r, label, delay in self.spec:
+            if k == key:
+                time.sleep(delay)
+                if label is None:
+                    raise OSError(f"{root}: not ready")
+                return Volume(key, root, label)
+        return None
+
+
+def default_provider():
+    return WindowsVolumes() if sys.platform == "win32" else MountVolumes()
+
+
+# ────────────────────────────────────────────────────────────────
+# Discovery
+# ────────────────────────────────────────────────────────────────
+# {(provider name, key): Volume or None} – answers for this session
+_SESSION = {}
+_SESSION_LOCK = threading.Lock()
+
+
+def _probe(provider, key, root):
+    try:
+        vol = provider.probe(key, root)
+    except OSError:
+        vol = None
+    with _SESSION_LOCK:
+        _SESSION[(provider.name, key)] = vol
+    return vol
+
+
+def discover(provider, deliver, timeout=PROBE_TIMEOUT, use_cache=True):
+    """
+    Probe every candidate of *provider* in parallel.  *deliver(volume)*
+    is called (from worker threads) for each volume found, in whatever
+    order probes finish, then *deliver(None)* once everything answered or
+    timed out.  Candidates answered earlier this session are delivered
+    straight from the cache.  Returns at once.
+    """
+    cands = provider.candidates()
+
+    def run():
+        threads = []
+        for key, root in cands:
+            if use_cache:
+                with _SESSION_LOCK:
+                    known = (provider.name, key) in _SESSION
+                    vol = _SESSION.get((provider.name, key))
+                if known:
+                    if vol is not None:
+                        deliver(vol)
+                    continue
+
+            def one(key=key, root=root):
+                vol = _probe(provider, key, root)
+                with gate:
+                    if vol is not None and not reported:
+                        deliver(vol)
+            t = threading.Thread(target=one, name=f"probe {key}", daemon=True)
+            t.start()
+            threads.append((key, t))
+
+        deadline = time.monotonic() + timeout
+        for key, t in threads:
+            t.join(max(0.0, deadline - time.monotonic()))
+            if t.is_alive():
+                with _SESSION_LOCK:       # until it answers, treat as absent
+                    _SESSION.setdefault((provider.name, key), None)
+        with gate:
+            reported.append(True)
+            deliver(None)
+
+    gate = threading.Lock()               # nothing is delivered after None
+    reported = []
+    threading.Thread(target=run, name="volumes", daemon=True).start()
+    return [key for key, _root in cands]